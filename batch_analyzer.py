@@ -0,0 +1,242 @@
+import argparse
+import csv
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from features import FeatureEngine, LANDMARK_COUNT, LANDMARK_FIELDS
+from rules import RuleSet, compile_rules, load_rules
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+PARQUET_BATCH_ROWS = 2048
+STRING_COLUMNS = ("video", "status", "guidance")
+
+# Per-process state, set up once by init_worker
+worker_pose = None
+worker_features = None
+worker_rules = None
+
+
+def init_worker(model_complexity, rules_path=None):
+    global worker_pose, worker_features, worker_rules
+    worker_pose = mp.solutions.pose.Pose(model_complexity=model_complexity)
+    worker_features = FeatureEngine()
+    worker_rules = RuleSet(load_rules(rules_path), worker_features.names)
+
+
+def landmark_columns():
+    return [f"lm{i}_{field}" for i in range(LANDMARK_COUNT) for field in LANDMARK_FIELDS]
+
+
+class CsvWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+        self.columns = columns
+
+    def write(self, row):
+        self.writer.writerow([row[c] for c in self.columns])
+
+    def close(self):
+        self.file.close()
+
+
+class JsonlWriter:
+    def __init__(self, path, columns):
+        self.file = open(path, "w", encoding="utf-8")
+
+    def write(self, row):
+        self.file.write(json.dumps(row) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path, columns):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow: pip install pyarrow")
+        self.pa = pa
+        self.columns = columns
+        # Explicit types, so a batch with nobody in view (all None) is not typed null
+        self.schema = pa.schema([
+            (name, pa.string() if name in STRING_COLUMNS else pa.int64() if name == "frame" else pa.float64())
+            for name in columns
+        ])
+        self.rows = []
+        self.writer = None
+        self.path = path
+        self.pq = pq
+
+    def write(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, self.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {"csv": CsvWriter, "jsonl": JsonlWriter, "parquet": ParquetWriter}
+
+
+def output_path(output_dir, input_dir, video_path, fmt):
+    # Mirrors the input tree, so a/cam1.mp4 and b/cam1.mp4 get separate outputs
+    name = os.path.splitext(os.path.relpath(video_path, input_dir))[0]
+    return os.path.join(output_dir, f"{name}.{fmt}")
+
+
+def analyze_video(video_path, input_dir, output_dir, fmt, stride):
+    # Runs inside a worker process; writes to a .partial file and renames it when the
+    # video is complete, so an interrupted run never leaves output that --resume trusts.
+    final_path = output_path(output_dir, input_dir, video_path, fmt)
+    # Relative path, not basename, so rows from a/cam1.mp4 and b/cam1.mp4 stay distinguishable
+    video_name = os.path.relpath(video_path, input_dir)
+    partial_path = final_path + ".partial"
+    os.makedirs(os.path.dirname(final_path), exist_ok=True)
+    started = time.perf_counter()
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Failed to open video {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+
+    worker_pose.reset()
+    feature_names = worker_features.names
+    columns = ["video", "frame", "time_s", "status", "guidance"] + feature_names + landmark_columns()
+    writer = WRITERS[fmt](partial_path, columns)
+
+    frame_index = 0
+    analyzed = 0
+    try:
+        while True:
+            if frame_index % stride:
+                # grab() skips decoding into a numpy frame we would throw away
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+
+            ret, frame = cap.read()
+            if not ret:
+                break
+
+            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            results = worker_pose.process(image)
+
+            row = {
+                "video": video_name,
+                "frame": frame_index,
+                "time_s": round(frame_index / fps, 3),
+            }
+            if results.pose_landmarks:
+                landmarks = worker_features.from_pose_landmarks(results.pose_landmarks)
+                features = worker_features.compute(landmarks)
+                good, guidance = worker_rules.classify(features, landmarks)
+                status = "Good" if good else "Bad"
+                flat = landmarks.ravel().tolist()
+            else:
+                features = np.full(len(feature_names), np.nan)
+                status, guidance = "Not Detected", ""
+                flat = [None] * (LANDMARK_COUNT * len(LANDMARK_FIELDS))
+
+            row["status"] = status
+            row["guidance"] = guidance
+            for name, value in zip(feature_names, features.tolist()):
+                row[name] = None if np.isnan(value) else round(value, 3)
+            row.update(zip(columns[-len(flat):], flat))
+            writer.write(row)
+
+            analyzed += 1
+            frame_index += 1
+    finally:
+        writer.close()
+        cap.release()
+
+    os.replace(partial_path, final_path)
+    return video_path, analyzed, time.perf_counter() - started
+
+
+def find_videos(input_dir, extensions):
+    videos = []
+    for root, _, files in os.walk(input_dir):
+        for name in files:
+            if name.lower().endswith(extensions):
+                videos.append(os.path.join(root, name))
+    return sorted(videos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless posture analysis of recorded videos")
+    parser.add_argument("input_dir", help="directory searched recursively for video files")
+    parser.add_argument("-o", "--output-dir", default="posture_results")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="csv")
+    parser.add_argument("-s", "--stride", type=int, default=1, help="analyze every Nth frame")
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--rules", help="JSON file of posture rules to classify with instead of the defaults")
+    parser.add_argument("--resume", action="store_true", help="skip videos whose output is already complete")
+    args = parser.parse_args()
+
+    if args.stride < 1:
+        parser.error("--stride must be at least 1")
+    try:
+        # Checked here so a bad rule file is reported once instead of by every worker
+        compile_rules(args.rules)
+    except ValueError as e:
+        parser.error(str(e))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    videos = find_videos(args.input_dir, VIDEO_EXTENSIONS)
+    if args.resume:
+        videos = [v for v in videos if not os.path.exists(output_path(args.output_dir, args.input_dir, v, args.format))]
+    if not videos:
+        print("No videos to analyze.")
+        return
+
+    print(f"Analyzing {len(videos)} videos with {args.workers} workers")
+    started = time.perf_counter()
+    total_frames = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                             initargs=(args.model_complexity, args.rules)) as executor:
+        futures = {
+            executor.submit(analyze_video, v, args.input_dir, args.output_dir, args.format, args.stride): v
+            for v in videos
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                path, frames, elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"[{done}/{len(videos)}] {futures[future]}: error: {e}")
+                continue
+            total_frames += frames
+            print(f"[{done}/{len(videos)}] {path}: {frames} frames in {elapsed:.1f}s ({frames / elapsed:.1f} fps)")
+
+    elapsed = time.perf_counter() - started
+    print(f"Done: {total_frames} frames in {elapsed:.1f}s ({total_frames / elapsed:.1f} fps), {failed} failed")
+
+
+if __name__ == "__main__":
+    main()
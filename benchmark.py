@@ -0,0 +1,259 @@
+import argparse
+import json
+import platform
+import subprocess
+import time
+
+import cv2
+import numpy as np
+
+from features import LANDMARK_COUNT, FeatureEngine, calculate_angle
+from features import LEFT_HIP, LEFT_SHOULDER, NOSE, RIGHT_SHOULDER
+from fake_firebase import FakeDatabase
+from firebase_sink import FirebaseSink
+from profiling import rss_bytes, summarize
+from rules import DEFAULT_RULES, RuleSet
+from smoothing import PostureStateMachine
+
+EXTRA_RULES = 10
+FLUSH_BATCH = 30
+
+
+def synthetic_frames(count, size, seed=0):
+    rng = np.random.default_rng(seed)
+    width, height = size
+    return [rng.integers(0, 256, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def video_frames(path, count, size):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.resize(frame, size))
+    cap.release()
+    if not frames:
+        raise RuntimeError(f"Could not read frames from {path}")
+    return frames
+
+
+def synthetic_landmarks(count, seed=0):
+    # A roughly upright seated pose with per-frame jitter, plus full visibility
+    rng = np.random.default_rng(seed)
+    base = np.zeros((LANDMARK_COUNT, 4), dtype=np.float32)
+    base[:, 0] = np.linspace(0.35, 0.65, LANDMARK_COUNT)
+    base[:, 1] = np.linspace(0.2, 0.9, LANDMARK_COUNT)
+    base[:, 3] = 1.0
+    base[NOSE, :2] = (0.5, 0.25)
+    base[LEFT_SHOULDER, :2] = (0.62, 0.42)
+    base[RIGHT_SHOULDER, :2] = (0.38, 0.42)
+    base[LEFT_HIP, :2] = (0.58, 0.8)
+    stack = np.repeat(base[None], count, axis=0)
+    stack[:, :, :3] += rng.normal(0.0, 0.01, (count, LANDMARK_COUNT, 3)).astype(np.float32)
+    return stack
+
+
+def landmark_proto(landmarks):
+    from mediapipe.framework.formats import landmark_pb2
+
+    proto = landmark_pb2.NormalizedLandmarkList()
+    for x, y, z, visibility in landmarks.tolist():
+        proto.landmark.add(x=x, y=y, z=z, visibility=visibility)
+    return proto
+
+
+def time_stage(fn, iterations, warmup):
+    for i in range(warmup):
+        fn(i)
+    durations = []
+    rss_before = rss_bytes()
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    for i in range(iterations):
+        started = time.perf_counter()
+        fn(i)
+        durations.append(time.perf_counter() - started)
+    wall = time.perf_counter() - wall_start
+    result = summarize(durations)
+    result["cpu_percent"] = round((time.process_time() - cpu_start) / wall * 100.0, 1) if wall > 0 else 0.0
+    result["rss_growth_bytes"] = rss_bytes() - rss_before
+    return result
+
+
+def build_stages(args, frames, landmarks):
+    engine = FeatureEngine()
+    rgb_frames = [cv2.cvtColor(f, cv2.COLOR_BGR2RGB) for f in frames]
+    stages = {}
+
+    stages["cvtColor"] = lambda i: cv2.cvtColor(frames[i % len(frames)], cv2.COLOR_BGR2RGB)
+
+    def scalar_angles(i):
+        lm = landmarks[i % len(landmarks)]
+        calculate_angle(lm[LEFT_SHOULDER, :2], lm[NOSE, :2], lm[RIGHT_SHOULDER, :2])
+        calculate_angle(lm[LEFT_SHOULDER, :2], lm[LEFT_HIP, :2], lm[RIGHT_SHOULDER, :2])
+
+    stages["calculate_angle"] = scalar_angles
+    stages["feature_engine"] = lambda i: engine.compute(landmarks[i % len(landmarks)])
+
+    batch = landmarks[:256]
+    stages["feature_engine_batch256"] = lambda i: engine.compute(batch)
+
+    features = engine.compute(landmarks)
+    rules = RuleSet(DEFAULT_RULES, engine.names)
+    state = PostureStateMachine(rules)
+
+    def classify(i):
+        f = features[i % len(features)]
+        rules.classify(f)
+        state.update(f, landmarks[i % len(landmarks)], 1.0, i / 30.0)
+
+    stages["classification"] = classify
+
+    # The default rules plus EXTRA_RULES feature and landmark checks, to show the
+    # compiled evaluator's cost is flat in the number of rules
+    extra = [{"name": f"{name}_extra", "feature": name, "min": -180.0, "max": 180.0}
+             for name in engine.names[:EXTRA_RULES - 2]]
+    extra += [{"name": f"landmark{i}_y", "landmark": i, "field": "y", "min": 0.0, "max": 1.0}
+              for i in range(EXTRA_RULES - len(extra))]
+    many_rules = RuleSet(DEFAULT_RULES + extra, engine.names)
+    stages[f"classification_{len(many_rules.names)}rules"] = lambda i: many_rules.classify(
+        features[i % len(features)], landmarks[i % len(landmarks)])
+
+    if not args.no_pose:
+        import mediapipe as mp
+
+        pose = mp.solutions.pose.Pose(model_complexity=args.model_complexity)
+        stages["pose.process"] = lambda i: pose.process(rgb_frames[i % len(rgb_frames)])
+
+        protos = [landmark_proto(lm) for lm in landmarks[:64]]
+        stages["from_pose_landmarks"] = lambda i: engine.from_pose_landmarks(protos[i % len(protos)])
+        drawing = mp.solutions.drawing_utils
+        connections = mp.solutions.pose.POSE_CONNECTIONS
+        stages["draw_landmarks"] = lambda i: drawing.draw_landmarks(
+            rgb_frames[i % len(rgb_frames)].copy(), protos[i % len(protos)], connections)
+
+    stages.update(photo_stages(rgb_frames))
+
+    # What the GUI thread pays per transition: submit() only enqueues
+    db = FakeDatabase(latency=args.db_latency_ms / 1000.0)
+    sink = FirebaseSink(db, "benchmark", flush_interval=0.1, spool_dir=None)
+    statuses = ["Good", "Bad"]
+    stages["store_posture_data"] = lambda i: sink.submit(statuses[(i // 30) % 2], False, "")
+
+    # What the writer thread pays: one coalesced multi-path update for FLUSH_BATCH samples.
+    # The writer thread is stopped first and _flush() is driven directly, so each call is one flush.
+    flush_sink = FirebaseSink(FakeDatabase(latency=args.db_latency_ms / 1000.0), "benchmark-flush", spool_dir=None)
+    flush_sink.close()
+
+    def firebase_flush(i):
+        for n in range(FLUSH_BATCH):
+            flush_sink.submit(statuses[(i + n) % 2], False, "")
+        flush_sink._flush(flush_sink._drain(0))
+
+    stages[f"firebase_flush{FLUSH_BATCH}"] = firebase_flush
+    return stages, sink
+
+
+def photo_stages(rgb_frames):
+    try:
+        import tkinter as tk
+
+        from PIL import Image, ImageTk
+
+        root = tk.Tk()
+        root.withdraw()
+    except Exception as e:
+        print("Skipping PhotoImage stages:", e)
+        return {}
+
+    def photo_new(i):
+        ImageTk.PhotoImage(image=Image.fromarray(rgb_frames[i % len(rgb_frames)]))
+
+    photo = ImageTk.PhotoImage(image=Image.fromarray(rgb_frames[0]))
+
+    def photo_paste(i):
+        photo.paste(Image.fromarray(rgb_frames[i % len(rgb_frames)]))
+
+    return {"photoimage_new": photo_new, "photoimage_paste": photo_paste}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('commit')}):")
+    print(f"{'stage':<26} {'p50 before':>11} {'p50 now':>9} {'change':>8}")
+    for name, stats in current["stages"].items():
+        before = baseline["stages"].get(name)
+        if not before or not before["p50_ms"]:
+            continue
+        change = (stats["p50_ms"] - before["p50_ms"]) / before["p50_ms"] * 100.0
+        print(f"{name:<26} {before['p50_ms']:>11.3f} {stats['p50_ms']:>9.3f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the posture pipeline stages without camera or network")
+    parser.add_argument("--video", help="video file to take frames from (synthetic noise frames otherwise)")
+    parser.add_argument("--frames", type=int, default=120, help="distinct frames to cycle through")
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360)
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--no-pose", action="store_true", help="skip the MediaPipe stages")
+    parser.add_argument("--db-latency-ms", type=float, default=0.0, help="simulated Firebase round-trip")
+    parser.add_argument("--stage", action="append", help="only run the named stage (repeatable)")
+    parser.add_argument("-o", "--output", help="write results as JSON")
+    parser.add_argument("--compare", help="JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    size = (args.width, args.height)
+    frames = video_frames(args.video, args.frames, size) if args.video else synthetic_frames(args.frames, size)
+    landmarks = synthetic_landmarks(max(args.frames, 256))
+
+    rss_start = rss_bytes()
+    stages, sink = build_stages(args, frames, landmarks)
+    results = {}
+    for name, fn in stages.items():
+        if args.stage and name not in args.stage:
+            continue
+        results[name] = time_stage(fn, args.iterations, args.warmup)
+        print(f"{name:<26} p50 {results[name]['p50_ms']:>8.3f}ms  p95 {results[name]['p95_ms']:>8.3f}ms  "
+              f"p99 {results[name]['p99_ms']:>8.3f}ms  {results[name]['fps']:>9.1f}/s")
+    sink.close()
+
+    report = {
+        "commit": git_commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "video": args.video,
+            "frames": len(frames),
+            "iterations": args.iterations,
+            "size": list(size),
+            "model_complexity": None if args.no_pose else args.model_complexity,
+            "rules": DEFAULT_RULES,
+        },
+        "stages": results,
+        "firebase_sink": sink.stats(),
+        "rss_growth_bytes": rss_bytes() - rss_start,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print("Results written to", args.output)
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
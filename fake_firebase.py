@@ -0,0 +1,79 @@
+import time
+
+
+class FakeResponse:
+    def __init__(self, value):
+        self.value = value
+
+    def val(self):
+        return self.value
+
+
+class FakeDatabase:
+    """In-memory stand-in for the pyrebase Database used by FirebaseSink.
+
+    Like pyrebase, child() extends a path held on the instance itself and get()/update()
+    reset it, so one instance shared between threads mixes up paths here as it would
+    against the real database. Set error to make get()/update() raise it.
+    """
+
+    def __init__(self, store=None, latency=0.0):
+        self.store = {} if store is None else store
+        self.latency = latency
+        self.path = ""
+        self.build_query = {}
+        self.key_counter = 0
+        self.calls = {"update": 0, "get": 0}
+        self.error = None
+
+    def child(self, *names):
+        new = "/".join(str(n) for n in names)
+        self.path = f"{self.path}/{new}" if self.path else new
+        return self
+
+    def shallow(self):
+        self.build_query["shallow"] = True
+        return self
+
+    def generate_key(self):
+        self.key_counter += 1
+        return f"k{self.key_counter:012d}"
+
+    def _take_path(self):
+        path, self.path = self.path, ""
+        query, self.build_query = self.build_query, {}
+        return [name for name in path.split("/") if name], query
+
+    def _node(self, path, create=False):
+        node = self.store
+        for name in path:
+            if name not in node:
+                if not create:
+                    return None
+                node[name] = {}
+            node = node[name]
+        return node
+
+    def get(self):
+        path, query = self._take_path()
+        self.calls["get"] += 1
+        if self.error:
+            raise self.error
+        node = self._node(path)
+        if query.get("shallow") and isinstance(node, dict):
+            return FakeResponse(list(node))
+        return FakeResponse(node)
+
+    def update(self, data):
+        path, _ = self._take_path()
+        self.calls["update"] += 1
+        time.sleep(self.latency)
+        if self.error:
+            raise self.error
+        for key, value in data.items():
+            *parents, leaf = path + key.split("/")
+            parent = self._node(parents, create=True)
+            if value is None:
+                parent.pop(leaf, None)
+            else:
+                parent[leaf] = value
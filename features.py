@@ -0,0 +1,109 @@
+import numpy as np
+
+# MediaPipe Pose landmark indices (mp.solutions.pose.PoseLandmark), kept here so the
+# feature engine can be used without importing mediapipe.
+NOSE = 0
+LEFT_EAR = 7
+RIGHT_EAR = 8
+LEFT_SHOULDER = 11
+RIGHT_SHOULDER = 12
+LEFT_ELBOW = 13
+RIGHT_ELBOW = 14
+LEFT_WRIST = 15
+RIGHT_WRIST = 16
+LEFT_HIP = 23
+RIGHT_HIP = 24
+LEFT_KNEE = 25
+RIGHT_KNEE = 26
+
+LANDMARK_COUNT = 33
+LANDMARK_FIELDS = ("x", "y", "z", "visibility")
+
+# name -> (a, b, c): angle at b between b->a and b->c, in degrees
+DEFAULT_ANGLES = {
+    "shoulder_angle": (LEFT_SHOULDER, NOSE, RIGHT_SHOULDER),
+    "back_angle": (LEFT_SHOULDER, LEFT_HIP, RIGHT_SHOULDER),
+    "left_neck_flexion": (LEFT_EAR, LEFT_SHOULDER, LEFT_HIP),
+    "right_neck_flexion": (RIGHT_EAR, RIGHT_SHOULDER, RIGHT_HIP),
+    "left_trunk_angle": (LEFT_SHOULDER, LEFT_HIP, LEFT_KNEE),
+    "right_trunk_angle": (RIGHT_SHOULDER, RIGHT_HIP, RIGHT_KNEE),
+    "left_elbow_angle": (LEFT_SHOULDER, LEFT_ELBOW, LEFT_WRIST),
+    "right_elbow_angle": (RIGHT_SHOULDER, RIGHT_ELBOW, RIGHT_WRIST),
+}
+
+# name -> (a, b): signed tilt of the segment a->b against the image horizontal, in degrees
+DEFAULT_TILTS = {
+    "shoulder_tilt": (LEFT_SHOULDER, RIGHT_SHOULDER),
+    "hip_tilt": (LEFT_HIP, RIGHT_HIP),
+    "ear_tilt": (LEFT_EAR, RIGHT_EAR),
+}
+
+
+def calculate_angle(a, b, c):
+    a = np.array(a)
+    b = np.array(b)
+    c = np.array(c)
+
+    radians = np.arctan2(c[1] - b[1], c[0] - b[0]) - np.arctan2(a[1] - b[1], a[0] - b[0])
+    angle = np.abs(radians * 180.0 / np.pi)
+
+    if angle > 180.0:
+        angle = 360 - angle
+
+    return angle
+
+
+class FeatureEngine:
+    """Turns pose landmarks into a fixed table of posture features.
+
+    compute() takes a (33, 4) landmark array or an (N, 33, 4) stack and returns the
+    features in the order of self.names, so live frames and recorded batches share one
+    code path. Angles use the same convention as calculate_angle().
+    """
+
+    def __init__(self, angles=None, tilts=None):
+        angles = DEFAULT_ANGLES if angles is None else angles
+        tilts = DEFAULT_TILTS if tilts is None else tilts
+
+        self.names = list(angles) + list(tilts)
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.angle_count = len(angles)
+
+        triplets = np.array(list(angles.values()), dtype=np.intp).reshape(-1, 3)
+        pairs = np.array(list(tilts.values()), dtype=np.intp).reshape(-1, 2)
+        self.a, self.b, self.c = triplets.T
+        self.tilt_a, self.tilt_b = pairs.T
+        self.landmarks = np.zeros((LANDMARK_COUNT, 4), dtype=np.float32)
+
+    def from_pose_landmarks(self, pose_landmarks):
+        # Fills and returns the engine's own buffer; copy it if it must outlive the frame
+        out = self.landmarks
+        for i, lm in enumerate(pose_landmarks.landmark):
+            out[i, 0] = lm.x
+            out[i, 1] = lm.y
+            out[i, 2] = lm.z
+            out[i, 3] = lm.visibility
+        return out
+
+    def compute(self, landmarks):
+        xy = np.asarray(landmarks, dtype=np.float32)[..., :2]
+
+        ba = xy[..., self.a, :] - xy[..., self.b, :]
+        bc = xy[..., self.c, :] - xy[..., self.b, :]
+        angles = np.abs(np.degrees(np.arctan2(bc[..., 1], bc[..., 0]) - np.arctan2(ba[..., 1], ba[..., 0])))
+        angles = np.where(angles > 180.0, 360.0 - angles, angles)
+
+        seg = xy[..., self.tilt_b, :] - xy[..., self.tilt_a, :]
+        tilts = np.degrees(np.arctan2(seg[..., 1], np.abs(seg[..., 0])))
+
+        return np.concatenate((angles, tilts), axis=-1)
+
+    def visibility(self, landmarks):
+        # Weakest landmark visibility behind each feature
+        vis = np.asarray(landmarks, dtype=np.float32)[..., 3]
+        angle_vis = np.minimum(np.minimum(vis[..., self.a], vis[..., self.b]), vis[..., self.c])
+        tilt_vis = np.minimum(vis[..., self.tilt_a], vis[..., self.tilt_b])
+        return np.concatenate((angle_vis, tilt_vis), axis=-1)
+
+    def as_dict(self, features):
+        return {name: float(features[i]) for i, name in enumerate(self.names)}
@@ -1,3 +1,3 @@
-from PyInstaller.utils.hooks import collect_submodules
-
-hiddenimports = collect_submodules("PIL")
+# Only the Tk bridge is needed; collecting every PIL submodule pulled in all image plugins
+hiddenimports = ["PIL._tkinter_finder", "PIL.ImageTk"]
+excludedimports = ["PIL.ImageQt", "PIL.ImageShow"]
@@ -10,7 +10,14 @@ a = Analysis(
     hookspath=['.'],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # Not used by the app; keeps the archive (and onefile extraction) smaller
+    excludes=[
+        'pandas', 'scipy', 'sympy', 'IPython', 'jedi', 'notebook', 'pytest', 'pyarrow',
+        'tensorflow', 'torch', 'jax', 'jaxlib',
+        'PyQt5', 'PyQt6', 'PySide2', 'PySide6', 'wx',
+        'matplotlib.backends.backend_qtagg', 'matplotlib.backends.backend_qt5agg', 'matplotlib.backends.backend_wxagg',
+        'numpy.tests', 'PIL.tests', 'tkinter.test', 'pydoc_data',
+    ],
     noarchive=False,
     optimize=0,
 )
@@ -26,7 +33,8 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    # UPX-compressed libraries are decompressed on every launch
+    upx=False,
     upx_exclude=[],
     runtime_tmpdir=None,
     console=True,
@@ -0,0 +1,258 @@
+import argparse
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from features import FeatureEngine
+from firebase_sink import FirebaseSink, firebase_config
+from pipeline import resize_to_fit
+from rollups import DEFAULT_STORE_PATH, PostureAggregator, RollupStore
+from rules import DEFAULT_CALIBRATION_DIR, compile_rules, load_calibration
+from smoothing import LandmarkSmoother, PostureStateMachine, feature_confidence
+
+
+def parse_source(source):
+    # "0" is a camera index; anything else is handed to OpenCV as a file path or URL
+    return int(source) if source.isdigit() else source
+
+
+def inference_worker(task_queue, result_queue, model_complexity):
+    import mediapipe as mp
+
+    # One Pose per stream so MediaPipe's frame-to-frame tracking is never mixed between seats
+    poses = {}
+    engine = FeatureEngine()
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        stream_id, frame_id, captured_at, frame = task
+        if stream_id not in poses:
+            poses[stream_id] = mp.solutions.pose.Pose(model_complexity=model_complexity)
+        results = poses[stream_id].process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        landmarks = None
+        if results.pose_landmarks:
+            landmarks = engine.from_pose_landmarks(results.pose_landmarks).copy()
+        result_queue.put((stream_id, frame_id, captured_at, landmarks))
+
+    for pose in poses.values():
+        pose.close()
+
+
+class Stream:
+    """One monitored seat: a capture thread plus the posture state for its user_id."""
+
+    def __init__(self, stream_id, user_id, source, task_queue, sink, frame_size, rollup_store, rules):
+        self.stream_id = stream_id
+        self.user_id = user_id
+        self.source = parse_source(source)
+        self.task_queue = task_queue
+        self.sink = sink
+        self.frame_size = frame_size
+
+        self.features = FeatureEngine()
+        self.smoother = LandmarkSmoother()
+        self.posture_state = PostureStateMachine(rules)
+        self.aggregator = PostureAggregator(rollup_store, user_id)
+
+        self.in_flight = threading.Event()
+        self.running = False
+        self.thread = None
+        self.error = None
+
+        self.captured = deque(maxlen=120)
+        self.inferred = deque(maxlen=120)
+        self.latencies = deque(maxlen=120)
+        self.dropped = 0
+
+    def start(self):
+        self.running = True
+        self.aggregator.start()
+        self.thread = threading.Thread(target=self._capture_loop, name=f"capture-{self.user_id}", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(2.0)
+        self.aggregator.stop(self.sink)
+
+    def _capture_loop(self):
+        cap = cv2.VideoCapture(self.source)
+        if not cap.isOpened():
+            self.error = f"Failed to open source {self.source}"
+            return
+        # Video files are paced at their own frame rate; cameras and streams deliver in real time
+        is_file = isinstance(self.source, str) and "://" not in self.source and os.path.exists(self.source)
+        frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if is_file else 0.0
+
+        frame_id = 0
+        try:
+            while self.running:
+                started = time.perf_counter()
+                ret, frame = cap.read()
+                if not ret:
+                    self.error = f"Source {self.source} ended"
+                    return
+                frame_id += 1
+                self.captured.append(started)
+
+                # Only one frame per stream is ever queued for inference, so a slow pool
+                # drops stale frames here instead of building up lag
+                if self.in_flight.is_set():
+                    self.dropped += 1
+                else:
+                    if self.frame_size:
+                        frame = resize_to_fit(frame, self.frame_size)
+                    self.in_flight.set()
+                    self.task_queue.put((self.stream_id, frame_id, started, frame))
+
+                if frame_interval:
+                    time.sleep(max(frame_interval - (time.perf_counter() - started), 0.0))
+        finally:
+            cap.release()
+
+    def handle_result(self, captured_at, landmarks):
+        self.in_flight.clear()
+        now = time.perf_counter()
+        self.inferred.append(now)
+        self.latencies.append(now - captured_at)
+
+        angles = shoulder_angle = back_angle = None
+        confidence = 0.0
+        if landmarks is not None:
+            landmarks = self.smoother.update(landmarks, captured_at)
+            angles = self.features.compute(landmarks)
+            shoulder_angle = angles[self.features.index["shoulder_angle"]]
+            back_angle = angles[self.features.index["back_angle"]]
+            confidence = feature_confidence(self.features, landmarks)
+        else:
+            self.smoother.reset()
+
+        event = self.posture_state.update(angles, landmarks, confidence, captured_at)
+        if event:
+            posture_status = "Not Detected" if event.state == "Absent" else event.state
+            if self.sink:
+                self.sink.submit(posture_status, event.notification, event.guidance)
+            else:
+                print(f"{self.user_id}: {event}")
+        self.aggregator.add_sample(self.posture_state.state, shoulder_angle, back_angle)
+        if self.sink:
+            self.aggregator.sync(self.sink)
+
+    def stats(self):
+        def rate(stamps):
+            return (len(stamps) - 1) / (stamps[-1] - stamps[0]) if len(stamps) > 1 and stamps[-1] > stamps[0] else 0.0
+
+        latency = sum(self.latencies) / len(self.latencies) * 1000.0 if self.latencies else 0.0
+        return {
+            "capture_fps": round(rate(self.captured), 1),
+            "inference_fps": round(rate(self.inferred), 1),
+            "dropped": self.dropped,
+            "latency_ms": round(latency, 1),
+            "state": self.posture_state.state,
+        }
+
+
+def parse_stream(value):
+    user_id, sep, source = value.partition("=")
+    if not sep or not user_id or not source:
+        raise argparse.ArgumentTypeError("streams are given as USER_ID=SOURCE")
+    return user_id, source
+
+
+def print_stats(streams):
+    print(f"{'user_id':<24} {'capture':>8} {'infer':>8} {'dropped':>8} {'latency':>9}  state")
+    for stream in streams:
+        stats = stream.stats()
+        print(f"{stream.user_id:<24} {stats['capture_fps']:>8} {stats['inference_fps']:>8} {stats['dropped']:>8} "
+              f"{stats['latency_ms']:>7}ms  {stream.error or stats['state']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless posture monitoring for several cameras")
+    parser.add_argument("--stream", dest="streams", action="append", type=parse_stream, required=True,
+                        help="USER_ID=SOURCE, where SOURCE is a camera index, video file or stream URL")
+    parser.add_argument("-w", "--workers", type=int, default=max(os.cpu_count() - 1, 1))
+    parser.add_argument("--model-complexity", type=int, choices=(0, 1, 2), default=1)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=360, help="frames are scaled to fit width x height")
+    parser.add_argument("--stats-interval", type=float, default=5.0)
+    parser.add_argument("--rules", help="JSON file of posture rules to classify with instead of the defaults")
+    parser.add_argument("--calibration-dir", default=DEFAULT_CALIBRATION_DIR,
+                        help="directory of per-user calibration files written by the desktop app")
+    parser.add_argument("--rollup-db", default=DEFAULT_STORE_PATH, help="SQLite file for session rollups")
+    parser.add_argument("--no-firebase", action="store_true", help="print transitions instead of publishing them")
+    args = parser.parse_args()
+
+    # Compiled once up front so a bad rule file fails before any process is started
+    try:
+        rules = compile_rules(args.rules)
+    except ValueError as e:
+        parser.error(str(e))
+
+    firebase = None
+    if not args.no_firebase:
+        import pyrebase
+
+        firebase = pyrebase.initialize_app(firebase_config)
+
+    workers = min(args.workers, len(args.streams))
+    result_queue = multiprocessing.Queue()
+    task_queues = [multiprocessing.Queue() for _ in range(workers)]
+    processes = [
+        multiprocessing.Process(target=inference_worker, args=(task_queues[i], result_queue, args.model_complexity),
+                                daemon=True)
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    # Streams are pinned to a worker so each keeps its Pose tracking state. Each sink gets
+    # its own Database: pyrebase keeps the child() path on the instance, so sinks flushing
+    # from their own threads must not share one.
+    rollup_store = RollupStore(args.rollup_db)
+    streams = [
+        Stream(i, user_id, source, task_queues[i % workers],
+               FirebaseSink(firebase.database(), user_id) if firebase else None, (args.width, args.height),
+               rollup_store, rules.with_thresholds(load_calibration(user_id, args.calibration_dir)))
+        for i, (user_id, source) in enumerate(args.streams)
+    ]
+    for stream in streams:
+        stream.start()
+    print(f"Monitoring {len(streams)} streams with {workers} inference workers")
+
+    next_stats = time.monotonic() + args.stats_interval
+    try:
+        while any(stream.running and not stream.error for stream in streams):
+            try:
+                stream_id, _, captured_at, landmarks = result_queue.get(timeout=0.5)
+                streams[stream_id].handle_result(captured_at, landmarks)
+            except queue.Empty:
+                pass
+            if time.monotonic() >= next_stats:
+                print_stats(streams)
+                next_stats = time.monotonic() + args.stats_interval
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for stream in streams:
+            stream.stop()
+        for task_queue in task_queues:
+            task_queue.put(None)
+        for process in processes:
+            process.join(5.0)
+        for stream in streams:
+            if stream.sink:
+                stream.sink.close()
+        rollup_store.close()
+        print_stats(streams)
+
+
+if __name__ == "__main__":
+    main()
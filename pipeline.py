@@ -0,0 +1,212 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+def fit_size(frame_size, box_size):
+    # Largest size with the frame's aspect ratio that fits the box
+    scale = min(box_size[0] / frame_size[0], box_size[1] / frame_size[1])
+    return int(frame_size[0] * scale), int(frame_size[1] * scale)
+
+
+def resize_to_fit(image, box_size, interpolation=cv2.INTER_LINEAR):
+    height, width = image.shape[:2]
+    size = fit_size((width, height), box_size)
+    if size == (width, height):
+        return image
+    return cv2.resize(image, size, interpolation=interpolation)
+
+
+class LatestSlot:
+    """Single-slot handoff between stages; a new item replaces an unconsumed one."""
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.item = None
+        self.closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self.condition:
+            if self.item is not None:
+                self.dropped += 1
+            self.item = item
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        with self.condition:
+            if self.item is None and not self.closed:
+                self.condition.wait(timeout)
+            item, self.item = self.item, None
+            return item
+
+    def get_nowait(self):
+        with self.condition:
+            item, self.item = self.item, None
+            return item
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class StageStats:
+    def __init__(self, window=60):
+        self.lock = threading.Lock()
+        self.stamps = deque(maxlen=window)
+        self.durations = deque(maxlen=window)
+
+    def record(self, started, finished):
+        with self.lock:
+            self.stamps.append(finished)
+            self.durations.append(finished - started)
+
+    def fps(self):
+        with self.lock:
+            if len(self.stamps) < 2:
+                return 0.0
+            span = self.stamps[-1] - self.stamps[0]
+            return (len(self.stamps) - 1) / span if span > 0 else 0.0
+
+    def mean_ms(self):
+        with self.lock:
+            if not self.durations:
+                return 0.0
+            return sum(self.durations) / len(self.durations) * 1000.0
+
+
+class FramePacket:
+    def __init__(self, frame_id, frame, captured_at):
+        self.frame_id = frame_id
+        self.frame = frame
+        self.captured_at = captured_at
+        self.image = None
+        self.results = None
+        self.display = None
+
+
+class PosePipeline:
+    """Capture -> pose inference -> render prep, each on its own thread.
+
+    Stages hand over through LatestSlot so inference always sees the freshest frame and
+    a slow stage drops frames instead of building up lag. The GUI consumes the render
+    output with poll() and reports glass-to-glass latency through displayed().
+    frame_size, inference_size and display_size are bounding boxes: frames are scaled
+    to fit them with their aspect ratio kept, so 4:3 and 16:9 cameras are not distorted.
+    max_display_fps caps how often the render stage draws and scales a preview frame;
+    packets in between still carry their results, with display left as None.
+    """
+
+    def __init__(self, cap, pose, draw_landmarks=None, frame_size=None, inference_size=None,
+                 display_size=None, preview=True, max_display_fps=None):
+        self.cap = cap
+        self.pose = pose
+        self.draw_landmarks = draw_landmarks
+        self.frame_size = frame_size
+        self.inference_size = inference_size
+        self.display_size = display_size
+        self.preview = preview
+        self.min_display_interval = 1.0 / max_display_fps if max_display_fps else 0.0
+        self.last_render = 0.0
+
+        self.inference_slot = LatestSlot()
+        self.render_slot = LatestSlot()
+        self.output_slot = LatestSlot()
+        self.stats_by_stage = {name: StageStats() for name in ("capture", "inference", "render", "display")}
+        self.latencies = deque(maxlen=120)
+
+        self.running = False
+        self.error = None
+        self.threads = []
+
+    def start(self):
+        self.running = True
+        for name, target in (("capture", self._capture_loop), ("inference", self._inference_loop),
+                             ("render", self._render_loop)):
+            thread = threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        for slot in (self.inference_slot, self.render_slot, self.output_slot):
+            slot.close()
+        for thread in self.threads:
+            if thread is not threading.current_thread():
+                thread.join(timeout)
+        self.threads = []
+
+    def poll(self):
+        return self.output_slot.get_nowait()
+
+    def displayed(self, packet):
+        now = time.perf_counter()
+        self.stats_by_stage["display"].record(now, now)
+        self.latencies.append(now - packet.captured_at)
+
+    def stats(self):
+        stats = {name: {"fps": round(s.fps(), 1), "ms": round(s.mean_ms(), 1)}
+                 for name, s in self.stats_by_stage.items()}
+        latencies = sorted(self.latencies)
+        if latencies:
+            stats["latency_ms"] = {
+                "mean": round(sum(latencies) / len(latencies) * 1000.0, 1),
+                "p95": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000.0, 1),
+            }
+        stats["dropped"] = {
+            "inference": self.inference_slot.dropped,
+            "render": self.render_slot.dropped,
+            "display": self.output_slot.dropped,
+        }
+        return stats
+
+    def _capture_loop(self):
+        frame_id = 0
+        while self.running:
+            started = time.perf_counter()
+            ret, frame = self.cap.read()
+            if not ret:
+                self.error = "Failed to read frame from camera."
+                self.running = False
+                self.inference_slot.close()
+                return
+            if self.frame_size:
+                frame = resize_to_fit(frame, self.frame_size)
+            frame_id += 1
+            self.inference_slot.put(FramePacket(frame_id, frame, started))
+            self.stats_by_stage["capture"].record(started, time.perf_counter())
+
+    def _inference_loop(self):
+        while self.running:
+            packet = self.inference_slot.get(timeout=0.5)
+            if packet is None:
+                continue
+            started = time.perf_counter()
+            packet.image = cv2.cvtColor(packet.frame, cv2.COLOR_BGR2RGB)
+            small = packet.image
+            if self.inference_size:
+                # Landmarks are normalized, so a smaller input needs no rescaling afterwards
+                small = resize_to_fit(small, self.inference_size, cv2.INTER_AREA)
+            packet.results = self.pose.process(small)
+            self.render_slot.put(packet)
+            self.stats_by_stage["inference"].record(started, time.perf_counter())
+
+    def _render_loop(self):
+        while self.running:
+            packet = self.render_slot.get(timeout=0.5)
+            if packet is None:
+                continue
+            started = time.perf_counter()
+            if self.preview and started - self.last_render >= self.min_display_interval:
+                self.last_render = started
+                display = packet.image
+                if self.draw_landmarks and packet.results.pose_landmarks:
+                    self.draw_landmarks(display, packet.results.pose_landmarks)
+                if self.display_size:
+                    display = resize_to_fit(display, self.display_size)
+                packet.display = display
+            self.output_slot.put(packet)
+            self.stats_by_stage["render"].record(started, time.perf_counter())
@@ -0,0 +1,112 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+
+PROFILE_ENV = "POSTURE_PROFILE"
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def summarize(durations):
+    # durations in seconds -> latency percentiles in ms and throughput
+    values = sorted(durations)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "mean_ms": round(total / len(values) * 1000.0, 3) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50) * 1000.0, 3),
+        "p95_ms": round(percentile(values, 0.95) * 1000.0, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000.0, 3),
+        "fps": round(len(values) / total, 1) if total > 0 else 0.0,
+    }
+
+
+def rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return 0
+
+
+class StartupTimer:
+    """Timestamps for startup phases, relative to when the timer was created."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.lock = threading.Lock()
+        self.phases = {}
+
+    def mark(self, phase):
+        elapsed = time.perf_counter() - self.started
+        with self.lock:
+            self.phases.setdefault(phase, elapsed)
+        print(f"Startup: {phase} after {elapsed:.2f}s")
+
+    def report(self):
+        with self.lock:
+            return {phase: round(elapsed, 3) for phase, elapsed in self.phases.items()}
+
+
+class LiveProfiler:
+    """Opt-in profiling for the running app, enabled by setting POSTURE_PROFILE to a directory.
+
+    cProfile covers the Tk thread; the pipeline, scheduler and sink stats are sampled
+    every interval seconds to stats.jsonl so the worker threads are covered too.
+    sample(force=True) writes a record regardless of the interval, e.g. the final stats on stop.
+    """
+
+    def __init__(self, directory=None, interval=5.0):
+        self.directory = directory if directory is not None else os.environ.get(PROFILE_ENV)
+        self.interval = interval
+        self.profile = None
+        self.last_sample = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    def start(self):
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self.profile = cProfile.Profile()
+        self.profile.enable()
+
+    def sample(self, force=False, **sources):
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        if not force and now - self.last_sample < self.interval:
+            return
+        self.last_sample = now
+        record = {"time": time.time(), "rss_bytes": rss_bytes(), "cpu_s": time.process_time()}
+        for name, source in sources.items():
+            if source is not None:
+                record[name] = source.stats()
+        with open(os.path.join(self.directory, "stats.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def stop(self):
+        if self.profile is None:
+            return
+        self.profile.disable()
+        path = os.path.join(self.directory, f"profile-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+        self.profile.dump_stats(path)
+        pstats.Stats(self.profile).sort_stats("cumulative").print_stats(15)
+        print("Profile written to", path)
+        self.profile = None
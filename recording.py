@@ -0,0 +1,233 @@
+import json
+import os
+import struct
+import time
+import zlib
+
+import numpy as np
+
+from features import LANDMARK_COUNT, FeatureEngine
+from rules import DEFAULT_RULES, RuleSet
+
+MAGIC = b"PSTR"
+VERSION = 1
+HEADER_ALIGN = 64
+PREFIX = struct.Struct("<4sII")  # magic, version, header length
+CHUNK = struct.Struct("<II")  # records in chunk, compressed bytes
+DEFAULT_RECORDING_DIR = os.path.join(os.path.expanduser("~"), ".posture_detection", "recordings")
+
+
+def record_dtype(feature_count):
+    return np.dtype([
+        ("timestamp", "<f8"),
+        ("landmarks", "<f4", (LANDMARK_COUNT, 4)),
+        ("features", "<f4", (feature_count,)),
+    ])
+
+
+class PostureRecorder:
+    """Appends landmark frames to a fixed-stride binary recording.
+
+    The file is a JSON header padded to HEADER_ALIGN bytes followed by records of
+    record_dtype(). With compress=True records are written as zlib chunks of
+    chunk_records instead, which RecordingReader decompresses on access.
+    """
+
+    def __init__(self, path, feature_names, compress=False, chunk_records=256):
+        self.path = path
+        self.compress = compress
+        self.dtype = record_dtype(len(feature_names))
+        self.buffer = np.zeros(chunk_records, dtype=self.dtype)
+        self.pending = 0
+        self.count = 0
+
+        meta = {
+            "feature_names": list(feature_names),
+            "landmark_count": LANDMARK_COUNT,
+            "compressed": compress,
+            "chunk_records": chunk_records,
+            "created": time.time(),
+        }
+        body = json.dumps(meta).encode("utf-8")
+        header_len = -(-(PREFIX.size + len(body)) // HEADER_ALIGN) * HEADER_ALIGN
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, "wb")
+        self.file.write(PREFIX.pack(MAGIC, VERSION, header_len))
+        self.file.write(body.ljust(header_len - PREFIX.size, b" "))
+
+    def append(self, landmarks, features, timestamp=None):
+        record = self.buffer[self.pending]
+        record["timestamp"] = time.time() if timestamp is None else timestamp
+        record["landmarks"] = landmarks
+        record["features"] = features
+        self.pending += 1
+        self.count += 1
+        if self.pending == len(self.buffer):
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        data = self.buffer[:self.pending].tobytes()
+        if self.compress:
+            packed = zlib.compress(data, 6)
+            self.file.write(CHUNK.pack(self.pending, len(packed)))
+            data = packed
+        self.file.write(data)
+        self.file.flush()
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class RecordingReader:
+    """Random access to a recording written by PostureRecorder.
+
+    Uncompressed recordings are memory-mapped, so records, landmarks, features and
+    timestamps are zero-copy views. Compressed recordings are indexed by chunk and
+    decompressed on demand when records are sliced.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, header_len = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a posture recording")
+            if version != VERSION:
+                raise ValueError(f"Unsupported recording version {version}")
+            self.meta = json.loads(f.read(header_len - PREFIX.size))
+
+        self.feature_names = self.meta["feature_names"]
+        self.dtype = record_dtype(len(self.feature_names))
+        self.header_len = header_len
+        self.chunks = []
+        self.cache = (None, None)
+
+        if self.meta["compressed"]:
+            self.records = None
+            self._index_chunks()
+        else:
+            # A crash can leave a partial trailing record; only map whole records
+            count = (os.path.getsize(path) - header_len) // self.dtype.itemsize
+            if count:
+                self.records = np.memmap(path, dtype=self.dtype, mode="r", offset=header_len, shape=(count,))
+            else:
+                self.records = np.zeros(0, dtype=self.dtype)
+
+    def _index_chunks(self):
+        size = os.path.getsize(self.path)
+        start = 0
+        with open(self.path, "rb") as f:
+            offset = self.header_len
+            while offset + CHUNK.size <= size:
+                f.seek(offset)
+                count, nbytes = CHUNK.unpack(f.read(CHUNK.size))
+                if offset + CHUNK.size + nbytes > size:
+                    break
+                self.chunks.append((start, count, offset + CHUNK.size, nbytes))
+                start += count
+                offset += CHUNK.size + nbytes
+        self.count = start
+
+    def __len__(self):
+        return len(self.records) if self.records is not None else self.count
+
+    def _chunk(self, index):
+        if self.cache[0] == index:
+            return self.cache[1]
+        _, count, offset, nbytes = self.chunks[index]
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = zlib.decompress(f.read(nbytes))
+        records = np.frombuffer(data, dtype=self.dtype, count=count)
+        self.cache = (index, records)
+        return records
+
+    def __getitem__(self, key):
+        if self.records is not None:
+            return self.records[key]
+        if isinstance(key, (int, np.integer)):
+            key = range(len(self))[key]
+            return self[key:key + 1][0]
+        start, stop, step = key.indices(len(self))
+        parts = []
+        for i, (chunk_start, count, _, _) in enumerate(self.chunks):
+            if chunk_start + count <= start or chunk_start >= stop:
+                continue
+            records = self._chunk(i)
+            parts.append(records[max(start - chunk_start, 0):stop - chunk_start])
+        if not parts:
+            return np.zeros(0, dtype=self.dtype)
+        return np.concatenate(parts)[::step]
+
+    @property
+    def timestamps(self):
+        return self[:]["timestamp"]
+
+    @property
+    def landmarks(self):
+        return self[:]["landmarks"]
+
+    @property
+    def features(self):
+        return self[:]["features"]
+
+    def iter_batches(self, batch_size=4096):
+        for start in range(0, len(self), batch_size):
+            yield self[start:start + batch_size]
+
+
+def replay(reader, engine=None, rules=None, thresholds=None, batch_size=4096):
+    """Re-classify a recording with different rules or thresholds; returns a boolean 'Good' array."""
+    engine = engine or FeatureEngine()
+    rules = rules or RuleSet(DEFAULT_RULES, engine.names)
+    if thresholds:
+        rules = rules.with_thresholds(thresholds)
+
+    good = np.zeros(len(reader), dtype=bool)
+    for i, batch in enumerate(reader.iter_batches(batch_size)):
+        features = engine.compute(batch["landmarks"])
+        start = i * batch_size
+        good[start:start + len(batch)] = rules.classify(features, batch["landmarks"])[0]
+    return good
+
+
+def new_recording_path(user_id, directory=DEFAULT_RECORDING_DIR):
+    return os.path.join(directory, f"{user_id}-{time.strftime('%Y%m%d-%H%M%S')}.pstr")
+
+
+def prune_recordings(directory=DEFAULT_RECORDING_DIR, keep_days=14, max_bytes=None, now=None):
+    # Deletes recordings older than keep_days, then the oldest ones beyond max_bytes in total
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    files = []
+    for name in names:
+        path = os.path.join(directory, name)
+        if not name.endswith(".pstr"):
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        files.append((stat.st_mtime, stat.st_size, path))
+
+    removed = []
+    total = 0
+    for mtime, size, path in sorted(files, reverse=True):
+        total += size
+        expired = keep_days is not None and now - mtime > keep_days * 86400
+        if expired or (max_bytes is not None and total > max_bytes):
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            removed.append(path)
+            total -= size
+    return removed
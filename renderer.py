@@ -0,0 +1,55 @@
+import time
+import tkinter as tk
+
+from PIL import Image, ImageTk
+
+
+class CanvasRenderer:
+    """Paints frames into one reusable canvas image item at a capped refresh rate.
+
+    Frames must already fit display_size (the pipeline's render stage scales them once)
+    and are centred on the canvas. The PhotoImage is created on the first frame and
+    updated with paste() afterwards, so a long session does not accumulate canvas items
+    or Tk images; it is only rebuilt if the frame size changes.
+    """
+
+    def __init__(self, canvas, display_size, max_fps=30):
+        self.canvas = canvas
+        self.display_size = display_size
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self.photo = None
+        self.item = None
+        self.last_paint = 0.0
+        self.label_values = {}
+
+    def due(self):
+        return time.perf_counter() - self.last_paint >= self.min_interval
+
+    def show(self, frame):
+        if not self.due():
+            return False
+        image = Image.fromarray(frame)
+        if self.photo is None or (self.photo.width(), self.photo.height()) != image.size:
+            self.clear()
+            self.photo = ImageTk.PhotoImage(image=image)
+        else:
+            self.photo.paste(image)
+        if self.item is None:
+            x = (int(self.canvas["width"]) - image.size[0]) // 2
+            y = (int(self.canvas["height"]) - image.size[1]) // 2
+            self.item = self.canvas.create_image(x, y, anchor=tk.NW, image=self.photo)
+        self.last_paint = time.perf_counter()
+        return True
+
+    def clear(self):
+        if self.item is not None:
+            self.canvas.delete(self.item)
+        self.item = None
+        self.photo = None
+
+    def update_label(self, label, **options):
+        # Tk relayouts on every config call, so skip it when nothing changed
+        if self.label_values.get(label) == options:
+            return
+        self.label_values[label] = options
+        label.config(**options)
@@ -0,0 +1,266 @@
+import os
+import sqlite3
+import time
+
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".posture_detection", "rollups.db")
+
+PERIOD_FORMATS = {
+    "minute": "%Y-%m-%dT%H:%M",
+    "hour": "%Y-%m-%dT%H",
+    "day": "%Y-%m-%d",
+}
+STATUS_COLUMNS = {"Good": "good_s", "Bad": "bad_s"}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    started REAL NOT NULL,
+    ended REAL,
+    good_s REAL NOT NULL DEFAULT 0,
+    bad_s REAL NOT NULL DEFAULT 0,
+    absent_s REAL NOT NULL DEFAULT 0,
+    bad_episodes INTEGER NOT NULL DEFAULT 0,
+    longest_bad_s REAL NOT NULL DEFAULT 0,
+    dirty INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS sessions_user_time ON sessions (user_id, started);
+
+CREATE TABLE IF NOT EXISTS rollups (
+    user_id TEXT NOT NULL,
+    period TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    good_s REAL NOT NULL DEFAULT 0,
+    bad_s REAL NOT NULL DEFAULT 0,
+    absent_s REAL NOT NULL DEFAULT 0,
+    bad_episodes INTEGER NOT NULL DEFAULT 0,
+    longest_bad_s REAL NOT NULL DEFAULT 0,
+    shoulder_sum REAL NOT NULL DEFAULT 0,
+    back_sum REAL NOT NULL DEFAULT 0,
+    angle_samples INTEGER NOT NULL DEFAULT 0,
+    dirty INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (user_id, period, bucket)
+);
+CREATE INDEX IF NOT EXISTS rollups_dirty ON rollups (user_id, dirty);
+"""
+
+UPSERT_ROLLUP = """
+INSERT INTO rollups (user_id, period, bucket, good_s, bad_s, absent_s, bad_episodes, longest_bad_s,
+                     shoulder_sum, back_sum, angle_samples, dirty)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1)
+ON CONFLICT (user_id, period, bucket) DO UPDATE SET
+    good_s = good_s + excluded.good_s,
+    bad_s = bad_s + excluded.bad_s,
+    absent_s = absent_s + excluded.absent_s,
+    bad_episodes = bad_episodes + excluded.bad_episodes,
+    longest_bad_s = MAX(longest_bad_s, excluded.longest_bad_s),
+    shoulder_sum = shoulder_sum + excluded.shoulder_sum,
+    back_sum = back_sum + excluded.back_sum,
+    angle_samples = angle_samples + excluded.angle_samples,
+    dirty = 1
+"""
+
+
+class RollupStore:
+    """SQLite store for posture sessions and minute/hour/day rollups."""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.executescript(SCHEMA)
+
+    def start_session(self, user_id, started):
+        with self.connection:
+            cursor = self.connection.execute("INSERT INTO sessions (user_id, started) VALUES (?, ?)",
+                                             (user_id, started))
+        return cursor.lastrowid
+
+    def update_session(self, session_id, totals, ended=None):
+        with self.connection:
+            self.connection.execute(
+                "UPDATE sessions SET ended = ?, good_s = ?, bad_s = ?, absent_s = ?, bad_episodes = ?, "
+                "longest_bad_s = ?, dirty = 1 WHERE id = ?",
+                (ended, totals["good_s"], totals["bad_s"], totals["absent_s"], totals["bad_episodes"],
+                 totals["longest_bad_s"], session_id),
+            )
+
+    def add_rollups(self, user_id, buckets):
+        rows = [
+            (user_id, period, bucket, b["good_s"], b["bad_s"], b["absent_s"], b["bad_episodes"], b["longest_bad_s"],
+             b["shoulder_sum"], b["back_sum"], b["angle_samples"])
+            for (period, bucket), b in buckets.items()
+        ]
+        with self.connection:
+            self.connection.executemany(UPSERT_ROLLUP, rows)
+
+    def rollups(self, user_id, period, since=None):
+        query = "SELECT * FROM rollups WHERE user_id = ? AND period = ?"
+        params = [user_id, period]
+        if since:
+            query += " AND bucket >= ?"
+            params.append(since)
+        cursor = self.connection.execute(query + " ORDER BY bucket", params)
+        columns = [c[0] for c in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def prune(self, user_id, period, before):
+        with self.connection:
+            self.connection.execute("DELETE FROM rollups WHERE user_id = ? AND period = ? AND bucket < ?",
+                                    (user_id, period, before))
+
+    def pending_documents(self, user_id, periods):
+        # Firebase documents for every rollup and session changed since the last sync
+        update = {}
+        placeholders = ",".join("?" * len(periods))
+        for row in self.connection.execute(
+            "SELECT period, bucket, good_s, bad_s, absent_s, bad_episodes, longest_bad_s, shoulder_sum, back_sum, "
+            f"angle_samples FROM rollups WHERE user_id = ? AND dirty = 1 AND period IN ({placeholders})",
+            [user_id, *periods],
+        ):
+            period, bucket, good_s, bad_s, absent_s, episodes, longest, shoulder_sum, back_sum, samples = row
+            update[f"rollups/{period}/{bucket}"] = {
+                "good_s": round(good_s, 1),
+                "bad_s": round(bad_s, 1),
+                "absent_s": round(absent_s, 1),
+                "bad_episodes": episodes,
+                "longest_bad_s": round(longest, 1),
+                "mean_shoulder_angle": round(shoulder_sum / samples, 1) if samples else None,
+                "mean_back_angle": round(back_sum / samples, 1) if samples else None,
+            }
+        for row in self.connection.execute(
+            "SELECT id, started, ended, good_s, bad_s, absent_s, bad_episodes, longest_bad_s FROM sessions "
+            "WHERE user_id = ? AND dirty = 1",
+            (user_id,),
+        ):
+            session_id, started, ended, good_s, bad_s, absent_s, episodes, longest = row
+            update[f"sessions/{time.strftime('%Y%m%d-%H%M%S', time.localtime(started))}-{session_id}"] = {
+                "started": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(started)),
+                "ended": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ended)) if ended else None,
+                "good_s": round(good_s, 1),
+                "bad_s": round(bad_s, 1),
+                "absent_s": round(absent_s, 1),
+                "bad_episodes": episodes,
+                "longest_bad_s": round(longest, 1),
+            }
+        return update
+
+    def mark_synced(self, user_id, periods):
+        placeholders = ",".join("?" * len(periods))
+        with self.connection:
+            self.connection.execute(f"UPDATE rollups SET dirty = 0 WHERE user_id = ? AND period IN ({placeholders})",
+                                    [user_id, *periods])
+            self.connection.execute("UPDATE sessions SET dirty = 0 WHERE user_id = ?", (user_id,))
+
+    def close(self):
+        self.connection.close()
+
+
+def empty_bucket():
+    return {"good_s": 0.0, "bad_s": 0.0, "absent_s": 0.0, "bad_episodes": 0, "longest_bad_s": 0.0,
+            "shoulder_sum": 0.0, "back_sum": 0.0, "angle_samples": 0}
+
+
+class PostureAggregator:
+    """Folds the per-frame posture stream of one user into a session and rollups.
+
+    Each sample's time since the previous one is credited to the previous status, so
+    the totals do not depend on the frame rate. Accumulated buckets are written to the
+    store every flush_interval seconds and only the hour/day rollups and session
+    summaries are published, through the FirebaseSink's next flush.
+    """
+
+    def __init__(self, store, user_id, flush_interval=10.0, sync_interval=60.0, sync_periods=("hour", "day"),
+                 max_gap=5.0, keep_minutes_days=7):
+        self.store = store
+        self.user_id = user_id
+        self.flush_interval = flush_interval
+        self.sync_interval = sync_interval
+        self.sync_periods = sync_periods
+        self.max_gap = max_gap
+        self.keep_minutes_days = keep_minutes_days
+
+        self.session_id = None
+        self.totals = None
+        self.buckets = {}
+        self.last_time = None
+        self.last_status = None
+        self.bad_since = None
+        self.last_flush = 0.0
+        self.last_sync = 0.0
+
+    def start(self, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        self.session_id = self.store.start_session(self.user_id, timestamp)
+        self.totals = empty_bucket()
+        self.last_time = None
+        self.last_status = None
+        self.bad_since = None
+        self.last_flush = timestamp
+
+    def add_sample(self, status, shoulder_angle=None, back_angle=None, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        targets = [self.totals] + [self._bucket(period, timestamp) for period in PERIOD_FORMATS]
+
+        if self.last_time is not None:
+            # Long gaps (app paused, machine asleep) are not credited to any status
+            elapsed = min(timestamp - self.last_time, self.max_gap)
+            column = STATUS_COLUMNS.get(self.last_status, "absent_s")
+            for bucket in targets:
+                bucket[column] += elapsed
+
+        if status == "Bad":
+            if self.last_status != "Bad":
+                self.bad_since = timestamp
+                for bucket in targets:
+                    bucket["bad_episodes"] += 1
+            streak = timestamp - self.bad_since
+            for bucket in targets:
+                bucket["longest_bad_s"] = max(bucket["longest_bad_s"], streak)
+
+        if shoulder_angle is not None:
+            for bucket in targets[1:]:
+                bucket["shoulder_sum"] += float(shoulder_angle)
+                bucket["back_sum"] += float(back_angle)
+                bucket["angle_samples"] += 1
+
+        self.last_time = timestamp
+        self.last_status = status
+        if timestamp - self.last_flush >= self.flush_interval:
+            self.flush(timestamp)
+
+    def _bucket(self, period, timestamp):
+        key = (period, time.strftime(PERIOD_FORMATS[period], time.localtime(timestamp)))
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = empty_bucket()
+        return bucket
+
+    def flush(self, timestamp=None, ended=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.buckets:
+            self.store.add_rollups(self.user_id, self.buckets)
+            self.buckets = {}
+        if self.session_id is not None:
+            self.store.update_session(self.session_id, self.totals, ended)
+        self.last_flush = timestamp
+
+    def sync(self, sink, force=False):
+        now = time.time()
+        if not force and now - self.last_sync < self.sync_interval:
+            return
+        update = self.store.pending_documents(self.user_id, self.sync_periods)
+        if update:
+            sink.publish(update)
+            self.store.mark_synced(self.user_id, self.sync_periods)
+        self.last_sync = now
+
+    def stop(self, sink=None, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        self.flush(timestamp, ended=timestamp)
+        if sink:
+            self.sync(sink, force=True)
+        # Minute rollups stay local and are only kept for recent sessions
+        cutoff = time.strftime(PERIOD_FORMATS["minute"], time.localtime(timestamp - self.keep_minutes_days * 86400))
+        self.store.prune(self.user_id, "minute", cutoff)
+        self.session_id = None
@@ -0,0 +1,205 @@
+import json
+import os
+import time
+
+import numpy as np
+
+from features import LANDMARK_COUNT, LANDMARK_FIELDS, FeatureEngine
+
+GOOD_GUIDANCE = "Keep it up! You're sitting well."
+BAD_GUIDANCE = "Sit upright! Your posture needs adjustment."
+
+SHOULDER_RANGE = (72, 88)
+BACK_RANGE = (25, 36)
+
+# Each rule checks one feature (see FeatureEngine.names) or one landmark field against
+# an inclusive [min, max] range; a missing bound means unbounded on that side. margin
+# is the hysteresis band in the rule's own units.
+DEFAULT_RULES = [
+    {
+        "name": "shoulder_angle",
+        "feature": "shoulder_angle",
+        "min": SHOULDER_RANGE[0],
+        "max": SHOULDER_RANGE[1],
+        "margin": 2.0,
+        "message": "Keep your head centred above your shoulders.",
+    },
+    {
+        "name": "back_angle",
+        "feature": "back_angle",
+        "min": BACK_RANGE[0],
+        "max": BACK_RANGE[1],
+        "margin": 2.0,
+        "message": BAD_GUIDANCE,
+    },
+]
+
+DEFAULT_CALIBRATION_DIR = os.path.join(os.path.expanduser("~"), ".posture_detection", "calibration")
+
+
+def load_rules(path=None):
+    if not path:
+        return DEFAULT_RULES
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class RuleSet:
+    """A declarative rule list compiled into index and bound arrays.
+
+    classify() gathers every rule's value with one fancy-indexing step and compares
+    all bounds at once, on a single frame or an (N, ...) batch, so the cost barely
+    grows with the number of rules. The guidance is the message of the first failing
+    rule in the order the rules were declared.
+    """
+
+    def __init__(self, rules, feature_names=None, thresholds=None):
+        feature_names = FeatureEngine().names if feature_names is None else feature_names
+        feature_index = {name: i for i, name in enumerate(feature_names)}
+        thresholds = thresholds or {}
+
+        self.rules = [dict(rule) for rule in rules]
+        self.feature_names = list(feature_names)
+        self.thresholds = dict(thresholds)
+
+        # Feature rules are gathered from the feature vector and landmark rules from the
+        # flattened (33 * 4) landmark array; "order" maps them back to declaration order.
+        feature_rules = [i for i, r in enumerate(self.rules) if "feature" in r]
+        landmark_rules = [i for i, r in enumerate(self.rules) if "feature" not in r]
+        order = feature_rules + landmark_rules
+        self.feature_idx = np.array([feature_index[self.rules[i]["feature"]] for i in feature_rules], dtype=np.intp)
+        self.landmark_idx = np.array([self._landmark_offset(self.rules[i]) for i in landmark_rules], dtype=np.intp)
+
+        if not self.rules:
+            raise ValueError("A rule set needs at least one rule")
+        low, high, margin = [], [], []
+        for i in order:
+            rule = self.rules[i]
+            bounds = thresholds.get(rule["name"], (rule.get("min"), rule.get("max")))
+            low.append(-np.inf if bounds[0] is None else bounds[0])
+            high.append(np.inf if bounds[1] is None else bounds[1])
+            margin.append(rule.get("margin", 0.0))
+            self._check_bounds(rule["name"], low[-1], high[-1], margin[-1])
+        self.low = np.array(low, dtype=np.float32)
+        self.high = np.array(high, dtype=np.float32)
+        self.margin = np.array(margin, dtype=np.float32)
+
+        # rank[j]: declaration position of compiled rule j; messages sorted by compiled position
+        self.rank = np.array(order, dtype=np.intp)
+        self.names = [self.rules[i]["name"] for i in order]
+        self.messages = np.array([self.rules[i].get("message", BAD_GUIDANCE) for i in order] + [GOOD_GUIDANCE],
+                                 dtype=object)
+        self.needs_landmarks = len(landmark_rules) > 0
+
+    @staticmethod
+    def _check_bounds(name, low, high, margin):
+        if low > high:
+            raise ValueError(f"Rule {name}: min {low} is above max {high}")
+        if margin < 0:
+            raise ValueError(f"Rule {name}: margin {margin} is negative")
+        # While Bad the range is narrowed by the margin on both sides; it must not vanish,
+        # or the rule could never pass again
+        if 2 * margin >= high - low:
+            raise ValueError(f"Rule {name}: range {low}..{high} is too narrow for margin {margin}")
+
+    @staticmethod
+    def _landmark_offset(rule):
+        landmark = rule["landmark"]
+        if not 0 <= landmark < LANDMARK_COUNT:
+            raise ValueError(f"Rule {rule['name']}: landmark index {landmark} out of range")
+        return landmark * len(LANDMARK_FIELDS) + LANDMARK_FIELDS.index(rule.get("field", "y"))
+
+    def with_thresholds(self, thresholds):
+        merged = dict(self.thresholds)
+        merged.update(thresholds)
+        return RuleSet(self.rules, self.feature_names, merged)
+
+    def values(self, features, landmarks=None):
+        values = np.asarray(features)[..., self.feature_idx]
+        if self.needs_landmarks:
+            landmarks = np.asarray(landmarks)
+            flat = landmarks.reshape(landmarks.shape[:-2] + (-1,))
+            values = np.concatenate((values, flat[..., self.landmark_idx]), axis=-1)
+        return values
+
+    def evaluate(self, features, landmarks=None, hysteresis=0):
+        # hysteresis=+1 widens every range by its margin, -1 narrows it
+        values = self.values(features, landmarks)
+        band = self.margin * hysteresis
+        return (values >= self.low - band) & (values <= self.high + band)
+
+    def classify(self, features, landmarks=None, hysteresis=0):
+        passed = self.evaluate(features, landmarks, hysteresis)
+        good = passed.all(axis=-1)
+        # Failing rule with the lowest declaration rank; len(rules) selects GOOD_GUIDANCE
+        failed_rank = np.where(passed, len(self.rank), self.rank)
+        first = failed_rank.argmin(axis=-1)
+        first = np.where(good, len(self.rank), first)
+        return good, self.messages[first]
+
+
+def compile_rules(path=None, feature_names=None):
+    # Any problem with a rule file (unreadable, bad JSON, unknown feature) as one ValueError
+    try:
+        return RuleSet(load_rules(path), feature_names)
+    except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+        raise ValueError(f"Invalid posture rules {path}: {e!r}") from e
+
+
+class Calibrator:
+    """Collects a few seconds of a user's neutral posture and re-centres the rules on it.
+
+    Each calibratable rule with both bounds keeps its width and is shifted so its
+    centre sits on the median value seen during calibration.
+    """
+
+    def __init__(self, rules, duration=5.0, min_samples=30):
+        self.rules = rules
+        self.duration = duration
+        self.min_samples = min_samples
+        self.samples = []
+        self.started = None
+
+    def add(self, features, landmarks, timestamp):
+        if self.started is None:
+            self.started = timestamp
+        self.samples.append(self.rules.values(features, landmarks).copy())
+        return self.done(timestamp)
+
+    def done(self, timestamp):
+        return (self.started is not None and timestamp - self.started >= self.duration
+                and len(self.samples) >= self.min_samples)
+
+    def thresholds(self):
+        if len(self.samples) < self.min_samples:
+            raise ValueError("Not enough calibration samples")
+        medians = np.median(np.stack(self.samples), axis=0)
+        by_name = {r["name"]: r for r in self.rules.rules}
+        thresholds = {}
+        for j, name in enumerate(self.rules.names):
+            low, high = float(self.rules.low[j]), float(self.rules.high[j])
+            if not by_name[name].get("calibrate", True) or not (np.isfinite(low) and np.isfinite(high)):
+                continue
+            half = (high - low) / 2.0
+            thresholds[name] = [round(float(medians[j]) - half, 2), round(float(medians[j]) + half, 2)]
+        return thresholds
+
+
+def calibration_path(user_id, directory=DEFAULT_CALIBRATION_DIR):
+    return os.path.join(directory, f"{user_id}.json")
+
+
+def save_calibration(user_id, thresholds, directory=DEFAULT_CALIBRATION_DIR):
+    os.makedirs(directory, exist_ok=True)
+    data = {"user_id": user_id, "calibrated": time.strftime("%Y-%m-%d %H:%M:%S"), "thresholds": thresholds}
+    with open(calibration_path(user_id, directory), "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return data
+
+
+def load_calibration(user_id, directory=DEFAULT_CALIBRATION_DIR):
+    try:
+        with open(calibration_path(user_id, directory), encoding="utf-8") as f:
+            return json.load(f)["thresholds"]
+    except (OSError, ValueError, KeyError):
+        return {}
@@ -0,0 +1,178 @@
+import time
+
+import cv2
+import numpy as np
+
+from features import LEFT_HIP, LEFT_SHOULDER, NOSE, RIGHT_HIP, RIGHT_SHOULDER
+
+CONFIDENCE_LANDMARKS = (NOSE, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP)
+
+
+class AdaptiveScheduler:
+    """Drop-in replacement for a Pose object that decides how much inference to spend.
+
+    process() skips inference and returns the previous results while the downsampled
+    frame difference stays under motion_threshold, crops to the region around the last
+    landmarks, and, with target_cpu set (percent of one core), trades model_complexity
+    and a minimum inference interval against measured process CPU time.
+    """
+
+    def __init__(self, pose_factory, complexity=1, min_complexity=0, max_complexity=2, roi=True, roi_margin=0.25,
+                 motion_threshold=2.0, motion_size=(64, 36), max_skip=30, target_cpu=None, low_confidence=0.6,
+                 adjust_interval=1.0):
+        self.pose_factory = pose_factory
+        self.poses = {}
+        self.complexity = complexity
+        self.min_complexity = min_complexity
+        self.max_complexity = max_complexity
+        self.roi = roi
+        self.roi_margin = roi_margin
+        self.motion_threshold = motion_threshold
+        self.motion_size = motion_size
+        self.max_skip = max_skip
+        self.target_cpu = target_cpu
+        self.low_confidence = low_confidence
+        self.adjust_interval = adjust_interval
+
+        self.counters = {"inferred": 0, "skipped_motion": 0, "skipped_budget": 0, "roi": 0, "roi_misses": 0}
+        self.reset()
+
+    def reset(self):
+        self.last_results = None
+        self.last_small = None
+        self.box = None
+        self.last_inference = 0.0
+        self.skipped = 0
+        self.min_interval = 0.0
+        self.confidence = 0.0
+        self.cpu_percent = 0.0
+        self.window_start = (time.perf_counter(), time.process_time())
+
+    def pose(self):
+        if self.complexity not in self.poses:
+            self.poses[self.complexity] = self.pose_factory(self.complexity)
+        return self.poses[self.complexity]
+
+    def close(self):
+        for pose in self.poses.values():
+            pose.close()
+        self.poses = {}
+
+    def process(self, image):
+        now = time.perf_counter()
+        self._adjust(now)
+
+        small = cv2.resize(cv2.cvtColor(image, cv2.COLOR_RGB2GRAY), self.motion_size, interpolation=cv2.INTER_AREA)
+        if self.last_results is not None and self.skipped < self.max_skip:
+            if now - self.last_inference < self.min_interval:
+                return self._skip("skipped_budget")
+            if cv2.absdiff(small, self.last_small).mean() < self.motion_threshold:
+                return self._skip("skipped_motion")
+
+        results = self._infer(image)
+        self.last_results = results
+        self.last_small = small
+        self.last_inference = now
+        self.skipped = 0
+        self.counters["inferred"] += 1
+        self.confidence = self._confidence(results)
+        return results
+
+    def _skip(self, reason):
+        self.skipped += 1
+        self.counters[reason] += 1
+        return self.last_results
+
+    def _infer(self, image):
+        box = self._roi_box(image.shape) if self.roi else None
+        if box is None:
+            return self.pose().process(image)
+
+        x0, y0, x1, y1 = box
+        results = self.pose().process(np.ascontiguousarray(image[y0:y1, x0:x1]))
+        if not results.pose_landmarks:
+            # Lost the person inside the crop; look at the whole frame again
+            self.counters["roi_misses"] += 1
+            self.box = None
+            return self.pose().process(image)
+
+        self.counters["roi"] += 1
+        height, width = image.shape[:2]
+        sx, sy = (x1 - x0) / width, (y1 - y0) / height
+        ox, oy = x0 / width, y0 / height
+        for lm in results.pose_landmarks.landmark:
+            lm.x = ox + lm.x * sx
+            lm.y = oy + lm.y * sy
+            lm.z = lm.z * sx
+        return results
+
+    def _roi_box(self, shape):
+        if self.last_results is None or not self.last_results.pose_landmarks:
+            self.box = None
+            return None
+        points = np.array([(lm.x, lm.y) for lm in self.last_results.pose_landmarks.landmark if lm.visibility > 0.5])
+        if len(points) < 4:
+            return None
+
+        height, width = shape[:2]
+        (left, top), (right, bottom) = points.min(axis=0), points.max(axis=0)
+        extent = int(left * width), int(top * height), int(np.ceil(right * width)), int(np.ceil(bottom * height))
+        margin_x = (right - left) * self.roi_margin
+        margin_y = (bottom - top) * self.roi_margin
+        left, right = max(left - margin_x, 0.0), min(right + margin_x, 1.0)
+        top, bottom = max(top - margin_y, 0.0), min(bottom + margin_y, 1.0)
+        if (right - left) * (bottom - top) > 0.8:
+            return None
+
+        box = int(left * width), int(top * height), int(np.ceil(right * width)), int(np.ceil(bottom * height))
+        if box[2] - box[0] < 32 or box[3] - box[1] < 32:
+            return None
+        # Every move of the crop shifts Pose's tracking coordinates, so landmark jitter of up
+        # to the margin keeps the previous crop, grown only if the landmarks left it
+        tolerance = (margin_x * width, margin_y * height) * 2
+        if self.box and all(abs(new - old) <= tol for new, old, tol in zip(box, self.box, tolerance)):
+            box = (min(self.box[0], extent[0]), min(self.box[1], extent[1]),
+                   max(self.box[2], extent[2]), max(self.box[3], extent[3]))
+        self.box = box
+        return box
+
+    def _confidence(self, results):
+        if not results.pose_landmarks:
+            return 0.0
+        landmarks = results.pose_landmarks.landmark
+        return min(landmarks[i].visibility for i in CONFIDENCE_LANDMARKS)
+
+    def _adjust(self, now):
+        wall_start, cpu_start = self.window_start
+        elapsed = now - wall_start
+        if elapsed < self.adjust_interval:
+            return
+        cpu_now = time.process_time()
+        self.cpu_percent = (cpu_now - cpu_start) / elapsed * 100.0
+        self.window_start = (now, cpu_now)
+        if self.target_cpu is None:
+            return
+
+        if self.cpu_percent > self.target_cpu * 1.1:
+            # Over budget: cheaper model first, then space inferences out
+            if self.complexity > self.min_complexity:
+                self.complexity -= 1
+            else:
+                self.min_interval = min(max(self.min_interval * 1.5, 0.05), 1.0)
+        elif self.cpu_percent < self.target_cpu * 0.7:
+            if self.min_interval > 0:
+                # Never settle below the 0.05 s floor the backoff started from
+                interval = self.min_interval / 1.5
+                self.min_interval = interval if interval >= 0.05 - 1e-9 else 0.0
+            elif self.confidence < self.low_confidence and self.complexity < self.max_complexity:
+                self.complexity += 1
+
+    def stats(self):
+        stats = dict(self.counters)
+        stats.update({
+            "complexity": self.complexity,
+            "cpu_percent": round(self.cpu_percent, 1),
+            "min_interval_ms": round(self.min_interval * 1000.0, 1),
+            "confidence": round(self.confidence, 2),
+        })
+        return stats
@@ -0,0 +1,172 @@
+import math
+
+import numpy as np
+
+from features import LANDMARK_COUNT
+from rules import DEFAULT_RULES, RuleSet
+
+ABSENT_GUIDANCE = "Step into view of the camera."
+
+
+class LandmarkSmoother:
+    """One-Euro (or plain EMA) filter over (33, 4) landmark frames.
+
+    Each landmark's update is scaled by its visibility, so an occluded joint holds its
+    last position instead of jumping. Filtered frames are kept in a ring buffer.
+    """
+
+    def __init__(self, method="one_euro", min_cutoff=1.0, beta=0.05, d_cutoff=1.0, ema_alpha=0.5, history=30):
+        if method not in ("one_euro", "ema"):
+            raise ValueError(f"Unknown smoothing method {method}")
+        self.method = method
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.ema_alpha = ema_alpha
+
+        self.value = np.zeros((LANDMARK_COUNT, 4), dtype=np.float32)
+        self.derivative = np.zeros((LANDMARK_COUNT, 3), dtype=np.float32)
+        self.last_time = None
+
+        self.ring = np.zeros((history, LANDMARK_COUNT, 4), dtype=np.float32)
+        self.ring_times = np.zeros(history, dtype=np.float64)
+        self.ring_index = 0
+        self.ring_count = 0
+
+    def reset(self):
+        self.last_time = None
+        self.ring_index = 0
+        self.ring_count = 0
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2.0 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def update(self, landmarks, timestamp):
+        if self.last_time is None:
+            self.value[:] = landmarks
+            self.derivative[:] = 0.0
+        else:
+            dt = max(timestamp - self.last_time, 1e-3)
+            xyz = landmarks[:, :3]
+            weight = landmarks[:, 3:4]
+            if self.method == "ema":
+                alpha = self.ema_alpha * weight
+            else:
+                speed = (xyz - self.value[:, :3]) / dt
+                self.derivative += self._alpha(self.d_cutoff, dt) * (speed - self.derivative)
+                cutoff = self.min_cutoff + self.beta * np.abs(self.derivative)
+                alpha = weight / (1.0 + 1.0 / (2.0 * math.pi * cutoff * dt))
+            self.value[:, :3] += alpha * (xyz - self.value[:, :3])
+            self.value[:, 3] = landmarks[:, 3]
+        self.last_time = timestamp
+
+        self.ring[self.ring_index] = self.value
+        self.ring_times[self.ring_index] = timestamp
+        self.ring_index = (self.ring_index + 1) % len(self.ring)
+        self.ring_count = min(self.ring_count + 1, len(self.ring))
+        return self.value
+
+    def window(self):
+        # Oldest-first copy of the buffered frames and their timestamps
+        order = (np.arange(self.ring_count) + self.ring_index - self.ring_count) % len(self.ring)
+        return self.ring[order], self.ring_times[order]
+
+
+class TransitionEvent:
+    def __init__(self, previous, state, timestamp, duration, notification, guidance):
+        self.previous = previous
+        self.state = state
+        self.timestamp = timestamp
+        self.duration = duration
+        self.notification = notification
+        self.guidance = guidance
+
+    def __repr__(self):
+        return f"TransitionEvent({self.previous} -> {self.state} after {self.duration:.1f}s)"
+
+
+class PostureStateMachine:
+    """Debounced Good/Bad/Absent state with hysteresis on the posture rules.
+
+    A frame only counts as leaving the current state when it clears the rule ranges by
+    each rule's margin, and the new state must hold for its debounce delay before a
+    TransitionEvent is emitted. A change of guidance within a state (a different rule
+    becoming the first to fail) is debounced the same way and emitted as an event
+    with an unchanged state. The notification flag is raised after notify_after
+    seconds of continuous Bad posture and cleared on any other state.
+    """
+
+    def __init__(self, rules=None, min_confidence=0.5, enter_bad_after=2.0, enter_good_after=1.0, absent_after=1.0,
+                 notify_after=15.0):
+        self.rules = rules if rules is not None else RuleSet(DEFAULT_RULES)
+        self.min_confidence = min_confidence
+        self.delays = {"Bad": enter_bad_after, "Good": enter_good_after, "Absent": absent_after}
+        self.notify_after = notify_after
+
+        self.state = "Absent"
+        self.state_since = None
+        self.guidance = ABSENT_GUIDANCE
+        self.notification = False
+        self.pending = None
+        self.pending_since = None
+        self.pending_guidance = None
+        self.pending_guidance_since = None
+
+    def classify(self, features, landmarks=None):
+        # Widen the ranges while Good and narrow them while Bad so borderline frames stick
+        hysteresis = 1 if self.state == "Good" else -1 if self.state == "Bad" else 0
+        good, guidance = self.rules.classify(features, landmarks, hysteresis)
+        return ("Good" if good else "Bad"), guidance
+
+    def update(self, features, landmarks, confidence, timestamp):
+        if self.state_since is None:
+            self.state_since = timestamp
+
+        if features is None or confidence < self.min_confidence:
+            candidate, guidance = "Absent", ABSENT_GUIDANCE
+        else:
+            candidate, guidance = self.classify(features, landmarks)
+
+        if candidate == self.state:
+            self.pending = None
+            if guidance == self.guidance:
+                self.pending_guidance = None
+            elif guidance != self.pending_guidance:
+                self.pending_guidance = guidance
+                self.pending_guidance_since = timestamp
+            elif timestamp - self.pending_guidance_since >= self.delays[candidate]:
+                self.guidance = guidance
+                self.pending_guidance = None
+                return TransitionEvent(self.state, self.state, timestamp, timestamp - self.state_since,
+                                       self.notification, guidance)
+        elif candidate != self.pending:
+            self.pending = candidate
+            self.pending_since = timestamp
+        elif timestamp - self.pending_since >= self.delays[candidate]:
+            return self._transition(candidate, guidance, timestamp)
+
+        notification = self.state == "Bad" and timestamp - self.state_since >= self.notify_after
+        if notification != self.notification:
+            self.notification = notification
+            return TransitionEvent(self.state, self.state, timestamp, timestamp - self.state_since, notification,
+                                   self.guidance)
+        return None
+
+    def _transition(self, state, guidance, timestamp):
+        # The new state is dated from when it first appeared, not from when the debounce expired
+        since = self.pending_since
+        event = TransitionEvent(self.state, state, timestamp, since - self.state_since, False, guidance)
+        self.state = state
+        self.state_since = since
+        self.guidance = guidance
+        self.pending = None
+        self.pending_guidance = None
+        self.notification = False
+        return event
+
+
+def feature_confidence(engine, landmarks, names=("shoulder_angle", "back_angle")):
+    visibility = engine.visibility(landmarks)
+    return float(min(visibility[engine.index[name]] for name in names))
@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from features import (DEFAULT_ANGLES, LANDMARK_COUNT, LEFT_SHOULDER, RIGHT_SHOULDER, FeatureEngine,
+                      calculate_angle)
+
+ENGINE = FeatureEngine()
+
+
+def random_landmarks(count, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(0.0, 1.0, (count, LANDMARK_COUNT, 4)).astype(np.float32)
+
+
+def pose_landmarks(landmarks):
+    points = [SimpleNamespace(x=float(x), y=float(y), z=float(z), visibility=float(v)) for x, y, z, v in landmarks]
+    return SimpleNamespace(landmark=points)
+
+
+def test_angles_match_calculate_angle():
+    for frame in random_landmarks(50):
+        features = ENGINE.compute(frame)
+        for name, (a, b, c) in DEFAULT_ANGLES.items():
+            expected = calculate_angle(frame[a, :2], frame[b, :2], frame[c, :2])
+            assert features[ENGINE.index[name]] == pytest.approx(expected, abs=1e-3)
+
+
+def test_batch_matches_single_frames():
+    landmarks = random_landmarks(20, seed=1)
+    batch = ENGINE.compute(landmarks)
+    assert batch.shape == (20, len(ENGINE.names))
+    for i, frame in enumerate(landmarks):
+        np.testing.assert_allclose(batch[i], ENGINE.compute(frame), rtol=1e-6)
+
+
+@pytest.mark.parametrize("right_y, sign", [(0.6, 1), (0.4, -1), (0.5, 0)])
+def test_tilt_sign(right_y, sign):
+    # Image y grows downwards, so a lower right shoulder is a positive tilt; the
+    # direction along x does not matter
+    landmarks = np.zeros((LANDMARK_COUNT, 4), dtype=np.float32)
+    landmarks[LEFT_SHOULDER, :2] = (0.6, 0.5)
+    landmarks[RIGHT_SHOULDER, :2] = (0.4, right_y)
+    tilt = ENGINE.compute(landmarks)[ENGINE.index["shoulder_tilt"]]
+    assert np.sign(round(float(tilt), 6)) == sign
+    landmarks[:, 0] = 1.0 - landmarks[:, 0]
+    assert ENGINE.compute(landmarks)[ENGINE.index["shoulder_tilt"]] == pytest.approx(tilt)
+
+
+def test_from_pose_landmarks_reuses_buffer():
+    engine = FeatureEngine()
+    first, second = random_landmarks(2, seed=2)
+    out = engine.from_pose_landmarks(pose_landmarks(first))
+    np.testing.assert_allclose(out, first)
+    assert out is engine.landmarks
+
+    again = engine.from_pose_landmarks(pose_landmarks(second))
+    assert again is out
+    np.testing.assert_allclose(out, second)
+
+
+def test_visibility_is_weakest_landmark():
+    landmarks = np.ones((LANDMARK_COUNT, 4), dtype=np.float32)
+    landmarks[RIGHT_SHOULDER, 3] = 0.2
+    visibility = ENGINE.visibility(landmarks)
+    assert visibility[ENGINE.index["shoulder_angle"]] == pytest.approx(0.2)
+    assert visibility[ENGINE.index["back_angle"]] == pytest.approx(0.2)
+    assert visibility[ENGINE.index["left_neck_flexion"]] == 1.0
@@ -0,0 +1,139 @@
+import json
+import os
+
+import pytest
+
+from fake_firebase import FakeDatabase
+from firebase_sink import FirebaseSink, is_rejected
+
+
+class FakeHTTPResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeHTTPError(Exception):
+    def __init__(self, *args, response=None):
+        super().__init__(*args)
+        self.response = response
+
+
+def rejected_error(status=403):
+    # pyrebase wraps the requests HTTPError as the first argument of a new one
+    return FakeHTTPError(FakeHTTPError("denied", response=FakeHTTPResponse(status)), '{"error": "denied"}')
+
+
+@pytest.fixture
+def db():
+    return FakeDatabase()
+
+
+def make_sink(db, tmp_path, **kwargs):
+    # The writer thread is stopped straight away and flushes are driven by the test
+    sink = FirebaseSink(db, "user", flush_interval=0.01, spool_dir=str(tmp_path), **kwargs)
+    sink.close()
+    return sink
+
+
+def flush(sink, *statuses):
+    for status in statuses:
+        sink.submit(status, False, f"{status} guidance")
+    sink._flush(sink._drain(0))
+
+
+def user_node(db):
+    return db.store["posture_logs"]["user"]
+
+
+def test_batch_is_coalesced_into_one_update(db, tmp_path):
+    sink = make_sink(db, tmp_path)
+    updates = db.calls["update"]
+    flush(sink, "Good", "Bad", "Good")
+
+    assert db.calls["update"] == updates + 1
+    node = user_node(db)
+    assert node["live"]["status"] == "Good"
+    assert node["Guidance_message"] == "Good guidance"
+    assert [entry["status"] for _, entry in sorted(node["history"].items())] == ["Good", "Bad", "Good"]
+
+
+def test_history_is_trimmed_to_limit(db, tmp_path):
+    sink = make_sink(db, tmp_path, history_limit=5)
+    for _ in range(4):
+        flush(sink, "Good", "Bad", "Good")
+
+    history = user_node(db)["history"]
+    assert len(history) == 5
+    assert sorted(history) == list(sink.history_keys)
+    assert max(history) == f"k{db.key_counter:012d}"
+
+
+def test_offline_writes_are_spooled_and_replayed(db, tmp_path):
+    sink = make_sink(db, tmp_path)
+    db.error = ConnectionError("offline")
+    flush(sink, "Bad")
+    assert os.path.exists(sink.spool_path)
+    assert sink.stats()["spooled"] == 1
+
+    db.error = None
+    sink.next_seed_attempt = 0.0
+    flush(sink)
+    assert not os.path.exists(sink.spool_path)
+    assert sink.stats()["replayed"] == 1
+    assert [entry["status"] for entry in user_node(db)["history"].values()] == ["Bad"]
+
+
+def test_rejected_write_is_quarantined_not_spooled(db, tmp_path):
+    sink = make_sink(db, tmp_path)
+    db.error = rejected_error()
+    flush(sink, "Bad")
+    assert not os.path.exists(sink.spool_path)
+    assert sink.stats()["rejected"] == 1
+    with open(sink.rejected_path, encoding="utf-8") as f:
+        assert len(f.readlines()) == 1
+
+    db.error = None
+    flush(sink, "Good")
+    assert user_node(db)["live"]["status"] == "Good"
+
+
+def test_bad_spool_line_does_not_block_replay(db, tmp_path):
+    sink = make_sink(db, tmp_path)
+    with open(sink.spool_path, "w", encoding="utf-8") as f:
+        f.write("{not json\n")
+        f.write(json.dumps({"history/k000000000999": {"status": "Good", "time": "t"}}) + "\n")
+
+    flush(sink)
+    assert not os.path.exists(sink.spool_path)
+    assert "k000000000999" in user_node(db)["history"]
+    assert sink.stats()["rejected"] == 1
+
+
+def test_history_seeding_merges_keys_written_offline(db, tmp_path):
+    db.store["posture_logs"] = {"user": {"history": {f"k{i:012d}": {"status": "Good", "time": "t"} for i in (1, 2, 3)}}}
+    db.key_counter = 100
+    db.error = ConnectionError("offline")
+    sink = FirebaseSink(db, "user", flush_interval=0.01, spool_dir=str(tmp_path), history_limit=4)
+    sink.close()
+    gets = db.calls["get"]
+
+    flush(sink, "Bad", "Good")
+    # The failed seed is not retried on every flush
+    assert db.calls["get"] == gets
+    assert not sink.history_seeded
+
+    db.error = None
+    sink.next_seed_attempt = 0.0
+    flush(sink)
+    assert sink.history_seeded
+    expected = [f"k{i:012d}" for i in (2, 3, 101, 102)]
+    assert list(sink.history_keys) == expected
+    assert sorted(user_node(db)["history"]) == expected
+
+
+def test_is_rejected():
+    assert is_rejected(rejected_error(403))
+    assert is_rejected(FakeHTTPError("bad request", response=FakeHTTPResponse(400)))
+    assert not is_rejected(rejected_error(429))
+    assert not is_rejected(rejected_error(503))
+    assert not is_rejected(ConnectionError("offline"))
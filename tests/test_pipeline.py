@@ -0,0 +1,116 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from pipeline import LatestSlot, PosePipeline, fit_size, resize_to_fit
+
+
+class FakeCap:
+    """Yields frames, then blocks until released so the last frame makes it through."""
+
+    def __init__(self, frames, hold=False):
+        self.frames = list(frames)
+        self.released = threading.Event()
+        if not hold:
+            self.released.set()
+
+    def read(self):
+        if not self.frames:
+            self.released.wait(5.0)
+            return False, None
+        return True, self.frames.pop(0)
+
+
+class FakePose:
+    def __init__(self):
+        self.shapes = []
+
+    def process(self, image):
+        self.shapes.append(image.shape)
+        return SimpleNamespace(pose_landmarks=None)
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            pytest.fail("timed out waiting for the pipeline")
+        time.sleep(0.01)
+
+
+def test_latest_slot_drops_oldest():
+    slot = LatestSlot()
+    for item in range(3):
+        slot.put(item)
+    assert slot.get_nowait() == 2
+    assert slot.dropped == 2
+    assert slot.get_nowait() is None
+
+
+def test_latest_slot_close_wakes_waiting_get():
+    slot = LatestSlot()
+    result = []
+    thread = threading.Thread(target=lambda: result.append(slot.get(timeout=5.0)))
+    thread.start()
+    time.sleep(0.05)
+    slot.close()
+    thread.join(1.0)
+    assert not thread.is_alive()
+    assert result == [None]
+
+
+@pytest.mark.parametrize("frame_size, box_size, expected", [
+    ((640, 480), (640, 360), (480, 360)),
+    ((1280, 720), (640, 480), (640, 360)),
+    ((640, 480), (640, 480), (640, 480)),
+    ((320, 240), (640, 640), (640, 480)),
+])
+def test_fit_size_keeps_aspect_ratio(frame_size, box_size, expected):
+    assert fit_size(frame_size, box_size) == expected
+
+
+def test_resize_to_fit():
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    assert resize_to_fit(image, (640, 480)) is image
+    assert resize_to_fit(image, (320, 320)).shape == (240, 320, 3)
+
+
+def test_pipeline_runs_frames_through_all_stages():
+    frames = [np.full((480, 640, 3), i, dtype=np.uint8) for i in range(5)]
+    pose = FakePose()
+    cap = FakeCap(frames, hold=True)
+    pipeline = PosePipeline(cap, pose, inference_size=(320, 320), display_size=(160, 160))
+    pipeline.start()
+    packets = []
+
+    def drain():
+        packet = pipeline.poll()
+        if packet is not None:
+            pipeline.displayed(packet)
+            packets.append(packet)
+        return bool(packets) and packets[-1].frame_id == 5
+
+    wait_for(drain)
+    cap.released.set()
+    pipeline.stop()
+
+    assert packets[-1].frame_id == 5
+    assert set(pose.shapes) == {(240, 320, 3)}
+    assert packets[-1].display.shape == (120, 160, 3)
+    stats = pipeline.stats()
+    assert stats["latency_ms"]["mean"] >= 0
+    assert set(stats["dropped"]) == {"inference", "render", "display"}
+
+
+def test_pipeline_reports_failed_read():
+    pipeline = PosePipeline(FakeCap([]), FakePose())
+    pipeline.start()
+    wait_for(lambda: pipeline.error is not None)
+    assert pipeline.error == "Failed to read frame from camera."
+    assert not pipeline.running
+    assert pipeline.inference_slot.closed
+    pipeline.stop()
+    assert pipeline.poll() is None
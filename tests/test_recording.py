@@ -0,0 +1,71 @@
+import os
+
+import numpy as np
+import pytest
+
+from features import LANDMARK_COUNT, FeatureEngine
+from recording import PostureRecorder, RecordingReader, prune_recordings, replay
+
+
+def synthetic_frames(count, seed=0):
+    rng = np.random.default_rng(seed)
+    landmarks = rng.uniform(0.2, 0.8, (count, LANDMARK_COUNT, 4)).astype(np.float32)
+    landmarks[..., 3] = 1.0
+    return landmarks
+
+
+def record(path, landmarks, engine, **kwargs):
+    recorder = PostureRecorder(str(path), engine.names, **kwargs)
+    for i, frame in enumerate(landmarks):
+        recorder.append(frame, engine.compute(frame), timestamp=100.0 + i)
+    recorder.close()
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_round_trip(tmp_path, compress):
+    engine = FeatureEngine()
+    landmarks = synthetic_frames(600)
+    path = tmp_path / "session.pstr"
+    record(path, landmarks, engine, compress=compress, chunk_records=64)
+
+    reader = RecordingReader(str(path))
+    assert len(reader) == 600
+    assert reader.feature_names == engine.names
+    np.testing.assert_array_equal(reader.landmarks, landmarks)
+    np.testing.assert_allclose(reader.features, engine.compute(landmarks), rtol=1e-5, atol=1e-4)
+    np.testing.assert_array_equal(reader.timestamps, 100.0 + np.arange(600))
+    np.testing.assert_array_equal(reader[130:200:7]["landmarks"], landmarks[130:200:7])
+    assert reader[-1]["timestamp"] == 699.0
+    assert sum(len(batch) for batch in reader.iter_batches(100)) == 600
+
+
+def test_truncated_recording_keeps_whole_records(tmp_path):
+    engine = FeatureEngine()
+    path = tmp_path / "session.pstr"
+    record(path, synthetic_frames(10), engine, compress=False)
+    with open(path, "r+b") as f:
+        f.truncate(os.path.getsize(path) - 10)
+    assert len(RecordingReader(str(path))) == 9
+
+
+def test_replay_matches_thresholds(tmp_path):
+    engine = FeatureEngine()
+    path = tmp_path / "session.pstr"
+    record(path, synthetic_frames(50), engine)
+
+    reader = RecordingReader(str(path))
+    assert replay(reader, thresholds={"shoulder_angle": (0, 180), "back_angle": (0, 180)}).all()
+    assert not replay(reader, thresholds={"back_angle": (200, 300)}).any()
+
+
+def test_prune_recordings(tmp_path):
+    now = 1_000_000.0
+    for name, age_days, size in (("old.pstr", 20, 10), ("mid.pstr", 5, 30), ("new.pstr", 1, 30), ("notes.txt", 30, 1)):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        os.utime(path, (now - age_days * 86400, now - age_days * 86400))
+
+    removed = prune_recordings(str(tmp_path), keep_days=14, max_bytes=50, now=now)
+    assert sorted(os.path.basename(p) for p in removed) == ["mid.pstr", "old.pstr"]
+    assert sorted(os.listdir(tmp_path)) == ["new.pstr", "notes.txt"]
+    assert prune_recordings(str(tmp_path / "missing")) == []
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+from rollups import PostureAggregator, RollupStore
+
+
+class RecordingSink:
+    def __init__(self):
+        self.updates = []
+
+    def publish(self, update):
+        self.updates.append(update)
+
+
+@pytest.fixture
+def store():
+    store = RollupStore(":memory:")
+    yield store
+    store.close()
+
+
+def local_time(text):
+    return time.mktime(time.strptime(text, "%Y-%m-%d %H:%M:%S"))
+
+
+def feed(aggregator, start, samples):
+    # samples: (status, seconds) pairs sent at one sample per second
+    t = start
+    for status, seconds in samples:
+        for _ in range(seconds):
+            aggregator.add_sample(status, 80.0 if status != "Absent" else None, 30.0, timestamp=t)
+            t += 1.0
+    return t
+
+
+def test_time_is_credited_to_the_previous_status(store):
+    start = local_time("2024-05-01 10:00:00")
+    aggregator = PostureAggregator(store, "user", flush_interval=1e9)
+    aggregator.start(start)
+    end = feed(aggregator, start, [("Good", 10), ("Bad", 5), ("Good", 3), ("Bad", 2), ("Absent", 4)])
+    aggregator.stop(timestamp=end)
+
+    (hour,) = store.rollups("user", "hour")
+    assert hour["bucket"] == "2024-05-01T10"
+    assert (hour["good_s"], hour["bad_s"], hour["absent_s"]) == (13.0, 7.0, 3.0)
+    assert hour["bad_episodes"] == 2
+    assert hour["longest_bad_s"] == 4.0
+    assert hour["angle_samples"] == 20
+    assert hour["back_sum"] == 600.0
+
+
+def test_samples_are_split_across_buckets(store):
+    start = local_time("2024-05-01 10:59:50")
+    aggregator = PostureAggregator(store, "user", flush_interval=1e9)
+    aggregator.start(start)
+    end = feed(aggregator, start, [("Good", 20)])
+    aggregator.stop(timestamp=end)
+
+    # Each interval is credited to the bucket of the sample that closes it
+    hours = {row["bucket"]: row["good_s"] for row in store.rollups("user", "hour")}
+    assert hours == {"2024-05-01T10": 9.0, "2024-05-01T11": 10.0}
+    assert sum(row["good_s"] for row in store.rollups("user", "minute")) == 19.0
+
+
+def test_long_gaps_are_capped(store):
+    start = local_time("2024-05-01 10:00:00")
+    aggregator = PostureAggregator(store, "user", flush_interval=1e9, max_gap=5.0)
+    aggregator.start(start)
+    aggregator.add_sample("Good", timestamp=start)
+    aggregator.add_sample("Good", timestamp=start + 600)
+    aggregator.stop(timestamp=start + 600)
+    (day,) = store.rollups("user", "day")
+    assert day["good_s"] == 5.0
+
+
+def test_sync_publishes_hour_day_and_sessions_once(store):
+    start = local_time("2024-05-01 10:00:00")
+    aggregator = PostureAggregator(store, "user", flush_interval=1e9)
+    aggregator.start(start)
+    end = feed(aggregator, start, [("Good", 5), ("Bad", 5)])
+    sink = RecordingSink()
+    aggregator.stop(sink, timestamp=end)
+
+    (update,) = sink.updates
+    assert set(update) == {"rollups/hour/2024-05-01T10", "rollups/day/2024-05-01",
+                           f"sessions/20240501-100000-{aggregator_session_id(store)}"}
+    assert update["rollups/day/2024-05-01"]["good_s"] == 5.0
+    assert update["rollups/day/2024-05-01"]["mean_shoulder_angle"] == 80.0
+    assert store.pending_documents("user", ("hour", "day")) == {}
+
+
+def test_old_minute_rollups_are_pruned(store):
+    aggregator = PostureAggregator(store, "user", flush_interval=1e9, keep_minutes_days=7)
+    old = local_time("2024-05-01 10:00:00")
+    aggregator.start(old)
+    feed(aggregator, old, [("Good", 3)])
+    aggregator.stop(timestamp=old + 3)
+
+    recent = old + 10 * 86400
+    aggregator.start(recent)
+    feed(aggregator, recent, [("Good", 3)])
+    aggregator.stop(timestamp=recent + 3)
+
+    assert [row["bucket"][:10] for row in store.rollups("user", "minute")] == ["2024-05-11"]
+    assert len(store.rollups("user", "day")) == 2
+
+
+def aggregator_session_id(store):
+    return store.connection.execute("SELECT MAX(id) FROM sessions").fetchone()[0]
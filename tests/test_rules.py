@@ -0,0 +1,133 @@
+import json
+
+import numpy as np
+import pytest
+
+from features import LANDMARK_COUNT, NOSE, FeatureEngine
+from rules import (BAD_GUIDANCE, DEFAULT_RULES, GOOD_GUIDANCE, Calibrator, RuleSet, compile_rules, load_calibration,
+                   save_calibration)
+
+ENGINE = FeatureEngine()
+HEAD_RULE = {"name": "head_height", "landmark": NOSE, "field": "y", "max": 0.5, "margin": 0.05,
+             "message": "Lift your head."}
+
+
+def features(shoulder=80.0, back=30.0):
+    values = np.zeros(len(ENGINE.names), dtype=np.float32)
+    values[ENGINE.index["shoulder_angle"]] = shoulder
+    values[ENGINE.index["back_angle"]] = back
+    return values
+
+
+def landmarks(nose_y=0.3):
+    values = np.zeros((LANDMARK_COUNT, 4), dtype=np.float32)
+    values[NOSE, 1] = nose_y
+    return values
+
+
+def test_default_rules():
+    rules = RuleSet(DEFAULT_RULES)
+    assert rules.classify(features()) == (True, GOOD_GUIDANCE)
+    assert rules.classify(features(back=40.0)) == (False, BAD_GUIDANCE)
+    assert rules.classify(features(shoulder=60.0))[1] == DEFAULT_RULES[0]["message"]
+
+
+def test_first_failing_rule_in_declaration_order():
+    # The landmark rule is compiled after the feature rules but declared first
+    rules = RuleSet([HEAD_RULE] + DEFAULT_RULES)
+    assert rules.classify(features(back=40.0), landmarks(nose_y=0.9)) == (False, "Lift your head.")
+    assert rules.classify(features(back=40.0), landmarks()) == (False, BAD_GUIDANCE)
+    assert rules.classify(features(), landmarks()) == (True, GOOD_GUIDANCE)
+
+
+def test_batch_matches_single_frames():
+    rules = RuleSet(DEFAULT_RULES + [HEAD_RULE])
+    batch_features = np.stack([features(), features(back=40.0), features(), features(shoulder=50.0)])
+    batch_landmarks = np.stack([landmarks(), landmarks(), landmarks(0.9), landmarks(0.9)])
+    good, messages = rules.classify(batch_features, batch_landmarks)
+    for i in range(4):
+        assert (good[i], messages[i]) == rules.classify(batch_features[i], batch_landmarks[i])
+    assert good.tolist() == [True, False, False, False]
+
+
+def test_hysteresis_margin():
+    rules = RuleSet(DEFAULT_RULES)
+    borderline = features(back=37.0)
+    assert not rules.classify(borderline)[0]
+    assert rules.classify(borderline, hysteresis=1)[0]
+    assert not rules.classify(features(back=35.0), hysteresis=-1)[0]
+
+
+def test_every_rule_is_compiled():
+    extra = [{"name": f"{name}_extra", "feature": name, "min": -180.0, "max": 180.0} for name in ENGINE.names[:8]]
+    extra += [{"name": f"landmark{i}_y", "landmark": i, "field": "y", "min": 0.0, "max": 1.0} for i in range(2)]
+    rules = RuleSet(DEFAULT_RULES + extra)
+    assert len(rules.names) == 12
+    assert rules.evaluate(features(), landmarks()).shape == (12,)
+
+
+def test_with_thresholds_overrides_bounds():
+    rules = RuleSet(DEFAULT_RULES).with_thresholds({"back_angle": [38, 48]})
+    assert rules.classify(features(back=40.0))[0]
+    assert not rules.classify(features())[0]
+
+
+def test_compile_rules_reports_bad_files(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps([{"name": "x", "feature": "no_such_feature", "min": 0}]))
+    with pytest.raises(ValueError, match="Invalid posture rules"):
+        compile_rules(str(path))
+    path.write_text("{not json")
+    with pytest.raises(ValueError):
+        compile_rules(str(path))
+    with pytest.raises(ValueError):
+        compile_rules(str(tmp_path / "missing.json"))
+    path.write_text(json.dumps([dict(HEAD_RULE, landmark=99)]))
+    with pytest.raises(ValueError, match="out of range"):
+        compile_rules(str(path))
+
+
+def test_calibrator_recentres_ranges_on_neutral_posture():
+    rules = RuleSet(DEFAULT_RULES + [HEAD_RULE])
+    calibrator = Calibrator(rules, duration=1.0, min_samples=5)
+    done = False
+    for i in range(20):
+        done = calibrator.add(features(shoulder=90.0, back=44.0 + (i % 3)), landmarks(), i * 0.1)
+        if done:
+            break
+    assert done
+    thresholds = calibrator.thresholds()
+    # Widths are kept; one-sided rules are not calibrated
+    assert thresholds == {"shoulder_angle": [82.0, 98.0], "back_angle": [39.5, 50.5]}
+    assert rules.with_thresholds(thresholds).classify(features(shoulder=90.0, back=45.0), landmarks())[0]
+
+
+def test_calibrator_needs_enough_samples():
+    calibrator = Calibrator(RuleSet(DEFAULT_RULES), duration=0.0, min_samples=3)
+    assert not calibrator.add(features(), None, 0.0)
+    with pytest.raises(ValueError):
+        calibrator.thresholds()
+
+
+def test_calibration_round_trip(tmp_path):
+    save_calibration("user", {"back_angle": [30.0, 41.0]}, directory=str(tmp_path))
+    assert load_calibration("user", directory=str(tmp_path)) == {"back_angle": [30.0, 41.0]}
+    assert load_calibration("someone-else", directory=str(tmp_path)) == {}
+
+
+@pytest.mark.parametrize("rules, problem", [
+    ([], "at least one rule"),
+    ([{"name": "back", "feature": "back_angle", "min": 40, "max": 33}], "above max"),
+    ([{"name": "back", "feature": "back_angle", "min": 30, "max": 33, "margin": 2}], "too narrow"),
+    ([{"name": "back", "feature": "back_angle", "min": 30, "max": 36, "margin": -1}], "negative"),
+])
+def test_compile_rules_rejects_unusable_rules(tmp_path, rules, problem):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps(rules))
+    with pytest.raises(ValueError, match=problem):
+        compile_rules(str(path))
+
+
+def test_narrowed_range_can_pass_again():
+    rule = {"name": "back", "feature": "back_angle", "min": 30, "max": 35, "margin": 2}
+    assert RuleSet([rule]).classify(features(back=32.5), hysteresis=-1)[0]
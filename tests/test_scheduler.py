@@ -0,0 +1,151 @@
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from features import LANDMARK_COUNT
+from scheduler import AdaptiveScheduler
+
+WIDTH, HEIGHT = 640, 360
+
+
+class FakePose:
+    """Finds the bright "person" rectangle in whatever image it is given, like Pose would."""
+
+    def __init__(self, complexity):
+        self.complexity = complexity
+        self.shapes = []
+        self.closed = False
+
+    def process(self, image):
+        self.shapes.append(image.shape)
+        ys, xs = np.nonzero(image[..., 0] > 128)
+        if not len(xs):
+            return SimpleNamespace(pose_landmarks=None)
+        height, width = image.shape[:2]
+        corners = [(xs.min(), ys.min()), (xs.max(), ys.min()), (xs.min(), ys.max()), (xs.max(), ys.max())]
+        landmarks = [
+            SimpleNamespace(x=(x + 0.5) / width, y=(y + 0.5) / height, z=0.1, visibility=0.9)
+            for x, y in (corners[i % 4] for i in range(LANDMARK_COUNT))
+        ]
+        return SimpleNamespace(pose_landmarks=SimpleNamespace(landmark=landmarks))
+
+    def close(self):
+        self.closed = True
+
+
+def frame(x0, y0, x1, y1):
+    image = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    image[y0:y1, x0:x1] = 255
+    return image
+
+
+def make_scheduler(**kwargs):
+    poses = []
+
+    def factory(complexity):
+        poses.append(FakePose(complexity))
+        return poses[-1]
+
+    kwargs.setdefault("motion_threshold", -1.0)
+    return AdaptiveScheduler(factory, **kwargs), poses
+
+
+def corners(results):
+    return [(lm.x, lm.y) for lm in results.pose_landmarks.landmark[:4]]
+
+
+def test_roi_landmarks_are_mapped_back_to_the_full_frame():
+    scheduler, poses = make_scheduler()
+    image = frame(200, 100, 300, 250)
+    full = corners(scheduler.process(image))
+    cropped = scheduler.process(image)
+
+    assert poses[0].shapes[0] == (HEIGHT, WIDTH, 3)
+    assert poses[0].shapes[1][:2] < (HEIGHT, WIDTH)
+    assert scheduler.counters["roi"] == 1
+    np.testing.assert_allclose(corners(cropped), full, atol=1e-6)
+    assert cropped.pose_landmarks.landmark[0].z < 0.1
+
+
+def test_roi_miss_falls_back_to_full_frame():
+    scheduler, poses = make_scheduler()
+    scheduler.process(frame(200, 100, 300, 250))
+    results = scheduler.process(frame(500, 20, 600, 120))
+
+    assert scheduler.counters["roi_misses"] == 1
+    assert scheduler.box is None
+    assert poses[0].shapes[-1] == (HEIGHT, WIDTH, 3)
+    assert corners(results)[0] == pytest.approx(((500 + 0.5) / WIDTH, (20 + 0.5) / HEIGHT))
+
+
+def test_crop_is_kept_under_landmark_jitter():
+    scheduler, _ = make_scheduler()
+    scheduler.process(frame(200, 100, 300, 250))
+    scheduler.process(frame(200, 100, 300, 250))
+    box = scheduler.box
+
+    for dx, dy in ((3, 0), (-2, 4), (4, -3), (0, 2)):
+        scheduler.process(frame(200 + dx, 100 + dy, 300 + dx, 250 + dy))
+        # Grown at most by the jitter, never moved
+        assert scheduler.box[0] <= box[0] and scheduler.box[2] >= box[2]
+        assert scheduler.box[0] >= box[0] - 4 and scheduler.box[2] <= box[2] + 4
+
+    scheduler.process(frame(260, 100, 360, 250))
+    scheduler.process(frame(260, 100, 360, 250))
+    assert scheduler.box[0] > box[0] + 40
+
+
+def test_motion_gating_and_max_skip():
+    scheduler, poses = make_scheduler(motion_threshold=2.0, max_skip=3)
+    image = frame(200, 100, 300, 250)
+    first = scheduler.process(image)
+    for _ in range(3):
+        assert scheduler.process(image) is first
+    assert scheduler.counters["skipped_motion"] == 3
+
+    # max_skip reached: inference runs even without motion
+    scheduler.process(image)
+    assert scheduler.counters["inferred"] == 2
+    assert len(poses[0].shapes) == 2
+
+    scheduler.process(frame(100, 50, 200, 200))
+    assert scheduler.counters["inferred"] == 3
+
+
+def test_adjust_trades_complexity_and_interval_against_cpu():
+    scheduler, poses = make_scheduler(complexity=1, target_cpu=50.0)
+
+    def window(cpu_percent):
+        now = time.perf_counter()
+        scheduler.window_start = (now - 1.0, time.process_time() - cpu_percent / 100.0)
+        scheduler._adjust(now)
+
+    window(90.0)
+    assert (scheduler.complexity, scheduler.min_interval) == (0, 0.0)
+    window(90.0)
+    assert scheduler.min_interval == pytest.approx(0.05)
+    window(90.0)
+    assert scheduler.min_interval == pytest.approx(0.075)
+
+    scheduler.confidence = 0.2
+    window(10.0)
+    assert scheduler.min_interval == pytest.approx(0.05)
+    window(10.0)
+    assert scheduler.min_interval == 0.0
+    window(10.0)
+    assert scheduler.complexity == 1
+
+    scheduler.pose()
+    scheduler.close()
+    assert [pose.complexity for pose in poses] == [1]
+    assert poses[0].closed
+
+
+def test_budget_interval_skips_inference():
+    scheduler, _ = make_scheduler()
+    scheduler.min_interval = 10.0
+    first = scheduler.process(frame(200, 100, 300, 250))
+    assert scheduler.process(frame(100, 50, 200, 200)) is first
+    assert scheduler.counters["skipped_budget"] == 1
@@ -0,0 +1,102 @@
+import numpy as np
+
+from features import LANDMARK_COUNT, FeatureEngine
+from rules import BAD_GUIDANCE, DEFAULT_RULES
+from smoothing import ABSENT_GUIDANCE, LandmarkSmoother, PostureStateMachine
+
+ENGINE = FeatureEngine()
+GOOD = (80.0, 30.0)
+BAD = (80.0, 45.0)
+
+
+def features(shoulder, back):
+    values = np.zeros(len(ENGINE.names), dtype=np.float32)
+    values[ENGINE.index["shoulder_angle"]] = shoulder
+    values[ENGINE.index["back_angle"]] = back
+    return values
+
+
+def run(machine, frames, fps=10.0, start=0.0):
+    # frames: (angles or None, seconds) pairs; returns the emitted events
+    events = []
+    t = start
+    for angles, seconds in frames:
+        for _ in range(int(seconds * fps)):
+            values = None if angles is None else features(*angles)
+            event = machine.update(values, None, 1.0 if angles else 0.0, t)
+            if event:
+                events.append(event)
+            t += 1.0 / fps
+    return events
+
+
+def test_enters_good_after_delay():
+    machine = PostureStateMachine(enter_good_after=1.0)
+    events = run(machine, [(GOOD, 0.9)])
+    assert events == [] and machine.state == "Absent"
+    events = run(machine, [(GOOD, 0.3)], start=0.9)
+    assert [e.state for e in events] == ["Good"]
+
+
+def test_short_bad_blips_are_ignored():
+    machine = PostureStateMachine(enter_bad_after=2.0)
+    run(machine, [(GOOD, 2.0)])
+    events = run(machine, [(BAD, 1.5), (GOOD, 0.5), (BAD, 1.5)], start=2.0)
+    assert events == [] and machine.state == "Good"
+
+
+def test_hysteresis_keeps_borderline_frames_in_state():
+    machine = PostureStateMachine()
+    run(machine, [(GOOD, 2.0)])
+    # Just outside the back range but within the rule's 2 degree margin
+    events = run(machine, [((80.0, 37.0), 5.0)], start=2.0)
+    assert events == [] and machine.state == "Good"
+
+
+def test_low_confidence_becomes_absent():
+    machine = PostureStateMachine(absent_after=1.0)
+    run(machine, [(GOOD, 2.0)])
+    events = run(machine, [(None, 1.5)], start=2.0)
+    assert [(e.previous, e.state) for e in events] == [("Good", "Absent")]
+    assert events[0].guidance == ABSENT_GUIDANCE
+
+
+def test_notification_after_continuous_bad():
+    machine = PostureStateMachine(enter_bad_after=1.0, notify_after=5.0)
+    events = run(machine, [(BAD, 8.0)])
+    assert [(e.state, e.notification) for e in events] == [("Bad", False), ("Bad", True)]
+    # The Bad state is dated from its first frame, not from the end of the debounce
+    assert abs(events[1].timestamp - 5.0) < 0.2
+    events = run(machine, [(GOOD, 2.0)], start=8.0)
+    assert [(e.state, e.notification) for e in events] == [("Good", False)]
+
+
+def test_guidance_follows_the_failing_rule():
+    machine = PostureStateMachine(enter_bad_after=1.0)
+    events = run(machine, [(BAD, 2.0), ((60.0, 30.0), 0.5)])
+    assert [e.guidance for e in events] == [BAD_GUIDANCE]
+    # A different rule failing for the debounce delay updates the guidance within Bad
+    events = run(machine, [((60.0, 30.0), 1.5)], start=2.5)
+    assert [(e.previous, e.state, e.guidance) for e in events] == [("Bad", "Bad", DEFAULT_RULES[0]["message"])]
+    assert machine.guidance == DEFAULT_RULES[0]["message"]
+
+
+def test_smoother_holds_occluded_landmarks():
+    smoother = LandmarkSmoother()
+    first = np.full((LANDMARK_COUNT, 4), 0.5, dtype=np.float32)
+    np.testing.assert_array_equal(smoother.update(first, 0.0), first)
+
+    moved = first.copy()
+    moved[:, :3] = 0.9
+    moved[0, 3] = 0.0
+    value = smoother.update(moved, 0.1)
+    assert value[0, 0] == 0.5
+    assert 0.5 < value[1, 0] < 0.9
+
+
+def test_smoother_window_is_oldest_first():
+    smoother = LandmarkSmoother(history=3)
+    for i in range(5):
+        smoother.update(np.full((LANDMARK_COUNT, 4), 1.0, dtype=np.float32), float(i))
+    _, times = smoother.window()
+    np.testing.assert_array_equal(times, [2.0, 3.0, 4.0])